@@ -0,0 +1,25 @@
+"""Stand-alone performance benchmarks, run as `python -m benchmarks.<name>`"""
+import contextlib
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lwl.settings')
+django.setup()
+
+
+@contextlib.contextmanager
+def test_database():
+    """Runs the block against a freshly migrated throwaway database, with
+    the same environment tweaks (DEBUG off, 'testserver' allowed) as tests"""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
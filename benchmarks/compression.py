@@ -0,0 +1,79 @@
+"""Compression ratio and CPU cost of every response encoding
+
+    python -m benchmarks.compression [--stories N ...] [--repeat 5]
+
+Fetches typical list and relationship responses uncompressed from a
+seeded dataset, then compresses each with every encoding
+lwlapi.compression has available (gzip always; br and zstd when brotli
+and zstandard are installed). Streamed lists are compressed chunk by
+chunk, as compression_middleware sends them. Reports the compressed
+size, the ratio, and the best-of-`--repeat` CPU time and throughput.
+"""
+import argparse
+import time
+
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+from lwlapi import compression
+from benchmarks import dataset, test_database
+
+
+def bodies(client, data):
+    """(label, chunks) of the responses to compress"""
+    user = data.user_ids[0]
+    for label, url, headers in (
+            ('story list', "/storys", {}),
+            ('story list (msgpack)', "/storys", {'HTTP_ACCEPT': 'application/msgpack'}),
+            ('story list ?uid', f"/storys?uid={user}", {}),
+            ('story list ?limit=100', "/storys?limit=100", {}),
+            ('story graph', f"/storys/{data.story_ids[0]}/graph", {}),
+            ('individualstory ?limit=100', "/individualstorys?limit=100", {}),
+            ('groupstory list', "/groupstorys", {}),
+            ('story list ?stream', "/storys?stream=true", {})):
+        response = client.get(url, **headers)
+        if response.streaming:
+            yield label, list(response.streaming_content)
+        else:
+            yield label, [response.content]
+
+
+def cpu_time(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.process_time()
+        func()
+        timings.append(time.process_time() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    dataset.add_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with test_database(), override_settings(LWL_RESPONSE_CACHE=False, LWL_COMPRESSION=False):
+        data = dataset.generate_from_args(args)
+        responses = list(bodies(APIClient(), data))
+
+    print(f"encodings: {', '.join(compression.ENCODINGS)}")
+    print(f"{'response':<28} {'enc':<5} {'bytes':>12} {'compressed':>12} {'ratio':>7} "
+          f"{'cpu ms':>9} {'MB/s':>8}")
+    for label, chunks in responses:
+        size = sum(len(chunk) for chunk in chunks)
+        for encoding in compression.ENCODINGS:
+            if len(chunks) > 1:
+                def run():
+                    return b''.join(compression.compress_stream(iter(chunks), encoding))
+            else:
+                def run():
+                    return compression.compress(chunks[0], encoding)
+            compressed = len(run())
+            seconds = cpu_time(args.repeat, run)
+            print(f"{label:<28} {encoding:<5} {size:>12,} {compressed:>12,} "
+                  f"{size / compressed:>6.1f}x {seconds * 1000:>9.2f} "
+                  f"{size / 1e6 / max(seconds, 1e-9):>8.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""WSGI vs ASGI throughput at increasing numbers of concurrent clients
+
+    python -m benchmarks.concurrency [--connections 1 50 500] [--duration 10]
+                                     [--think-ms 0] [dataset options]
+
+Builds a seeded SQLite file in a temporary directory, then serves it with
+one gunicorn worker (lwl/wsgi.py, gthread with --threads threads) and one
+uvicorn worker (lwl/asgi.py, the same sync views run by Django's thread
+adapter) in turn. Each run keeps N keep-alive connections busy with a mix
+of read requests for --duration seconds, from a small asyncio client in
+this process, and reports requests per second, p50/p99 latency and
+errors. --think-ms makes every client pause between requests, like slow
+mobile clients.
+
+gunicorn and uvicorn are not project dependencies; a server that is not
+installed is skipped.
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks import dataset
+from benchmarks.endpoints import percentile
+
+ROOT = Path(__file__).resolve().parent.parent
+SERVERS = {
+    'wsgi': ('gunicorn', lambda port, threads: [
+        sys.executable, '-m', 'gunicorn', 'lwl.wsgi:application', '--workers', '1',
+        '--worker-class', 'gthread', '--threads', str(threads),
+        '--worker-connections', '2000', '--backlog', '2048',
+        '--bind', f'127.0.0.1:{port}', '--log-level', 'warning']),
+    'asgi': ('uvicorn', lambda port, threads: [
+        sys.executable, '-m', 'uvicorn', 'lwl.asgi:application', '--workers', '1',
+        '--host', '127.0.0.1', '--port', str(port), '--backlog', '2048',
+        '--log-level', 'warning', '--no-access-log']),
+}
+
+
+def build_database(path, args):
+    env = {**os.environ, 'LWL_SQLITE_PATH': str(path)}
+    subprocess.run([sys.executable, 'manage.py', 'migrate', '-v', '0'],
+                   cwd=ROOT, env=env, check=True)
+    subprocess.run([sys.executable, '-m', 'benchmarks.dataset',
+                    '--users', str(args.users), '--stories', str(args.stories),
+                    '--individuals', str(args.individuals), '--groups', str(args.groups),
+                    '--links', str(args.links), '--seed', str(args.seed)],
+                   cwd=ROOT, env=env, check=True)
+
+
+def request_paths(path):
+    """A fixed mix of the read endpoints, built from rows in the database"""
+    with sqlite3.connect(path) as db:
+        stories = db.execute(
+            'SELECT id, uid_id FROM lwlapi_story ORDER BY id LIMIT 50').fetchall()
+        individuals = [row[0] for row in db.execute(
+            'SELECT DISTINCT individual_id FROM lwlapi_individualstory LIMIT 50')]
+    paths = []
+    for (story_id, user_id), individual_id in zip(stories, individuals):
+        paths += [
+            f'/storys/{story_id}',
+            f'/storys?uid={user_id}',
+            f'/storys/{story_id}/graph?individuals_limit=20&groups_limit=20',
+            f'/individualstorys/stories_by_individual?individual_id={individual_id}',
+            f'/users/{user_id}',
+        ]
+    return [path.encode() for path in paths]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def fetch(reader, writer, path):
+    writer.write(b'GET ' + path + b' HTTP/1.1\r\nHost: localhost\r\n\r\n')
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length = 0
+    for line in head.split(b'\r\n')[1:]:
+        name, _, value = line.partition(b':')
+        if name.strip().lower() == b'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def client(port, paths, offset, deadline, think, latencies, errors):
+    connection = None
+    position = offset
+    while time.perf_counter() < deadline:
+        path = paths[position % len(paths)]
+        position += 1
+        start = time.perf_counter()
+        try:
+            if connection is None:
+                connection = await asyncio.open_connection('127.0.0.1', port)
+            status = await fetch(*connection, path)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            errors.append(path)
+            if connection is not None:
+                connection[1].close()
+            connection = None
+            continue
+        if status != 200:
+            errors.append(path)
+        latencies.append(time.perf_counter() - start)
+        if think:
+            await asyncio.sleep(think)
+    if connection is not None:
+        connection[1].close()
+
+
+async def load(port, paths, connections, duration, think):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(
+        client(port, paths, offset, deadline, think, latencies, errors)
+        for offset in range(connections)))
+    latencies.sort()
+    return {
+        'rps': len(latencies) / duration,
+        'p50_ms': percentile(latencies, 0.50) * 1000 if latencies else 0,
+        'p99_ms': percentile(latencies, 0.99) * 1000 if latencies else 0,
+        'errors': len(errors),
+    }
+
+
+def wait_until_up(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('server exited during start-up')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('server did not start')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    dataset.add_arguments(parser)
+    parser.add_argument('--connections', type=int, nargs='+', default=[1, 50, 500])
+    parser.add_argument('--duration', type=float, default=10,
+                        help='seconds per server and connection count')
+    parser.add_argument('--think-ms', type=float, default=0,
+                        help='pause of every client between requests')
+    parser.add_argument('--threads', type=int, default=8,
+                        help='gunicorn threads')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'concurrency.sqlite3'
+        start = time.perf_counter()
+        build_database(path, args)
+        print(f"dataset generated in {time.perf_counter() - start:.1f} s")
+        paths = request_paths(path)
+
+        print(f"{'server':<6} {'connections':>11} {'req/s':>10} {'p50 ms':>9} "
+              f"{'p99 ms':>9} {'errors':>7}")
+        for name, (module, command) in SERVERS.items():
+            if importlib.util.find_spec(module) is None:
+                print(f"{name:<6} skipped, {module} is not installed")
+                continue
+
+            port = free_port()
+            env = {**os.environ, 'LWL_SQLITE_PATH': str(path)}
+            process = subprocess.Popen(command(port, args.threads), cwd=ROOT, env=env)
+            try:
+                wait_until_up(port, process)
+                for connections in args.connections:
+                    row = asyncio.run(load(port, paths, connections,
+                                           args.duration, args.think_ms / 1000))
+                    print(f"{name:<6} {connections:>11} {row['rps']:>10.1f} "
+                          f"{row['p50_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['errors']:>7}")
+            finally:
+                process.terminate()
+                process.wait()
+
+
+if __name__ == '__main__':
+    main()
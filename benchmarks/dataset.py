@@ -0,0 +1,128 @@
+"""Deterministic, seeded dataset generator for production-sized tests
+
+    python -m benchmarks.dataset --users 1000 --stories 1000000 ...
+
+writes into the configured database; benchmarks call generate() against
+a throwaway one. The same arguments and seed always produce the same
+rows, so results can be compared between runs and machines.
+"""
+import argparse
+import itertools
+import random
+import time
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import Max
+from lwlapi.models import Group, GroupStory, Individual, IndividualStory, Story, User
+
+WORDS = (
+    'after', 'alibi', 'aunt', 'birthday', 'borrowed', 'car', 'cousin', 'dinner',
+    'dog', 'exam', 'friday', 'gift', 'gym', 'holiday', 'homework', 'late',
+    'lost', 'meeting', 'neighbour', 'office', 'party', 'phone', 'rain', 'school',
+    'sick', 'sister', 'surprise', 'traffic', 'train', 'wallet', 'wedding', 'work',
+)
+TYPES = ('white', 'grey', 'black', 'harmless', 'serious')
+
+Dataset = namedtuple('Dataset', 'user_ids story_ids individual_ids group_ids')
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def _insert(model, objects, batch_size):
+    """Bulk inserts a generator of unsaved objects and returns their ids"""
+    start = model.objects.aggregate(start=Max('id'))['start'] or 0
+    objects = iter(objects)
+    while True:
+        batch = list(itertools.islice(objects, batch_size))
+        if not batch:
+            break
+        model.objects.bulk_create(batch, batch_size=batch_size)
+    return list(model.objects.filter(id__gt=start).order_by('id').values_list('id', flat=True))
+
+
+def _owned(model, count, user_ids, rng):
+    for i in range(count):
+        yield model(
+            name=f"{_text(rng, 2)} {i}",
+            uid_id=user_ids[rng.randrange(len(user_ids))],
+            description=_text(rng, rng.randint(5, 40)),
+            type=rng.choice(TYPES),
+        )
+
+
+def _links(model, owner_field, count, owner_ids, story_ids, rng):
+    """Yields `count` distinct (owner, story) links
+
+    Link k goes to story k % len(story_ids), so every story gets about the
+    same number of links; each story starts at a random owner offset so
+    the pairs are spread out but never repeat.
+    """
+    count = min(count, len(owner_ids) * len(story_ids))
+    offsets = [rng.randrange(len(owner_ids)) for _ in story_ids]
+    for k in range(count):
+        story = k % len(story_ids)
+        owner = (k // len(story_ids) + offsets[story]) % len(owner_ids)
+        yield model(**{f"{owner_field}_id": owner_ids[owner], 'story_id': story_ids[story]})
+
+
+def generate(users=100, stories=10_000, individuals=10_000, groups=2_000,
+             links=50_000, seed=0, batch_size=5_000):
+    """Creates the requested number of rows of every model
+
+    `links` is the number of IndividualStory rows and of GroupStory rows.
+
+    Returns:
+        Dataset -- ids of the created users, stories, individuals and groups
+    """
+    rng = random.Random(seed)
+    with transaction.atomic():
+        user_ids = _insert(User, (
+            User(name=_text(rng, 2)[:50], bio=_text(rng, rng.randint(3, 30)),
+                 uid=f"seed{seed}-user{i}")
+            for i in range(users)), batch_size)
+        story_ids = _insert(Story, _owned(Story, stories, user_ids, rng), batch_size)
+        individual_ids = _insert(
+            Individual, _owned(Individual, individuals, user_ids, rng), batch_size)
+        group_ids = _insert(Group, _owned(Group, groups, user_ids, rng), batch_size)
+
+        if story_ids and individual_ids:
+            _insert(IndividualStory, _links(
+                IndividualStory, 'individual', links, individual_ids, story_ids, rng), batch_size)
+        if story_ids and group_ids:
+            _insert(GroupStory, _links(
+                GroupStory, 'group', links, group_ids, story_ids, rng), batch_size)
+    return Dataset(user_ids, story_ids, individual_ids, group_ids)
+
+
+def add_arguments(parser):
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--stories', type=int, default=10_000)
+    parser.add_argument('--individuals', type=int, default=10_000)
+    parser.add_argument('--groups', type=int, default=2_000)
+    parser.add_argument('--links', type=int, default=50_000,
+                        help='rows in each of the two link tables')
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def generate_from_args(args):
+    return generate(users=args.users, stories=args.stories, individuals=args.individuals,
+                    groups=args.groups, links=args.links, seed=args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    dataset = generate_from_args(args)
+    print(f"created {len(dataset.user_ids)} users, {len(dataset.story_ids)} stories, "
+          f"{len(dataset.individual_ids)} individuals, {len(dataset.group_ids)} groups "
+          f"and up to {args.links} links per table in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
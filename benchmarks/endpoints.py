@@ -0,0 +1,271 @@
+"""Latency, query and payload benchmark for every ViewSet action
+
+    python -m benchmarks.endpoints [--requests 50] [--compare OLD.json]
+                                   [dataset options, see benchmarks.dataset]
+
+Generates a seeded dataset in a throwaway database, then calls every
+action of every ViewSet registered on the router in lwl/urls.py through
+the Django test client, in-process. Writes run inside a transaction that
+is rolled back, so every iteration sees the same data. Reports p50, p95
+and p99 latency, queries per request and bytes per response, and saves
+the numbers as JSON for later --compare runs.
+"""
+import argparse
+import json
+import platform
+import random
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import django
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+from lwl.urls import router
+from lwlapi.models import GroupStory, IndividualStory, User
+from benchmarks import dataset, test_database
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+STANDARD_ACTIONS = ('list', 'retrieve', 'create', 'update', 'partial_update', 'destroy')
+
+# ModelViewSet writes that cannot succeed through IndividualStoryView's
+# depth=1 (read-only nested) serializer
+UNSUPPORTED = {
+    ('individualstory', 'create'),
+    ('individualstory', 'update'),
+    ('individualstory', 'partial_update'),
+}
+
+
+def scenarios(data):
+    """Maps (basename, action) to labelled request factories
+
+    Each factory takes a seeded Random and returns (method, path, body).
+    """
+    def pick(rng, ids):
+        return ids[rng.randrange(len(ids))]
+
+    def sample(rng, ids, count=50):
+        return rng.sample(ids, min(count, len(ids)))
+
+    user_uids = dict(User.objects.filter(
+        id__in=data.user_ids[:100]).values_list('id', 'uid'))
+    individual_links = list(IndividualStory.objects.values_list(
+        'individual_id', 'story_id')[:1000])
+    group_links = list(GroupStory.objects.values_list('group_id', 'story_id')[:1000])
+
+    def owned_body(rng):
+        return {'name': 'benchmark', 'description': 'benchmark row',
+                'type': 'white', 'uid': pick(rng, data.user_ids[:100])}
+
+    def create_body(rng):
+        body = owned_body(rng)
+        body['uid'] = user_uids[body['uid']]
+        return body
+
+    table = {}
+    for basename, prefix, ids in (('story', 'storys', data.story_ids),
+                                  ('individual', 'individuals', data.individual_ids),
+                                  ('group', 'groups', data.group_ids)):
+        table[(basename, 'list')] = {
+            'list': lambda rng, prefix=prefix: ('get', f"/{prefix}", None),
+            'list?uid': lambda rng, prefix=prefix: (
+                'get', f"/{prefix}?uid={pick(rng, data.user_ids)}", None),
+            'list?limit': lambda rng, prefix=prefix: ('get', f"/{prefix}?limit=100", None),
+            'list?fields=id,name': lambda rng, prefix=prefix: (
+                'get', f"/{prefix}?fields=id,name", None),
+            'list?uid&expand=uid': lambda rng, prefix=prefix: (
+                'get', f"/{prefix}?uid={pick(rng, data.user_ids)}&expand=uid", None),
+        }
+        table[(basename, 'retrieve')] = {'retrieve': lambda rng, prefix=prefix, ids=ids: (
+            'get', f"/{prefix}/{pick(rng, ids)}", None)}
+        table[(basename, 'create')] = {'create': lambda rng, prefix=prefix: (
+            'post', f"/{prefix}", create_body(rng))}
+        table[(basename, 'update')] = {'update': lambda rng, prefix=prefix, ids=ids: (
+            'put', f"/{prefix}/{pick(rng, ids)}", owned_body(rng))}
+        table[(basename, 'destroy')] = {'destroy': lambda rng, prefix=prefix, ids=ids: (
+            'delete', f"/{prefix}/{pick(rng, ids)}", None)}
+        table[(basename, 'bulk')] = {'bulk x1000': lambda rng, prefix=prefix: (
+            'post', f"/{prefix}/bulk",
+            [dict(create_body(rng), external_id=f"benchmark-{i}") for i in range(1000)])}
+
+    table.update({
+        ('story', 'graph'): {'graph': lambda rng: (
+            'get', f"/storys/{pick(rng, data.story_ids)}/graph", None)},
+        ('story', 'add_individual_to_story'): {'add_individual_to_story': lambda rng: (
+            'post', f"/storys/{pick(rng, data.story_ids)}/add_individual_to_story",
+            {'individualIds': sample(rng, data.individual_ids)})},
+        ('story', 'add_group_to_story'): {'add_group_to_story': lambda rng: (
+            'post', f"/storys/{pick(rng, data.story_ids)}/add_group_to_story",
+            {'groupIds': sample(rng, data.group_ids)})},
+        ('story', 'remove_individual_from_story'): {'remove_individual_from_story': lambda rng: (
+            lambda link: ('delete', f"/storys/{link[1]}/remove_individual_from_story",
+                          {'individualId': link[0]}))(pick(rng, individual_links))},
+        ('story', 'remove_group_from_story'): {'remove_group_from_story': lambda rng: (
+            lambda link: ('delete', f"/storys/{link[1]}/remove_group_from_story",
+                          {'groupId': link[0]}))(pick(rng, group_links))},
+        ('individual', 'add_story_to_individual'): {'add_story_to_individual': lambda rng: (
+            'post', f"/individuals/{pick(rng, data.individual_ids)}/add_story_to_individual",
+            {'storyIds': sample(rng, data.story_ids)})},
+        ('individual', 'remove_story_from_individual'): {'remove_story_from_individual': lambda rng: (
+            lambda link: ('delete', f"/individuals/{link[0]}/remove_story_from_individual",
+                          {'storyId': link[1]}))(pick(rng, individual_links))},
+        ('group', 'add_story_to_group'): {'add_story_to_group': lambda rng: (
+            'post', f"/groups/{pick(rng, data.group_ids)}/add_story_to_group",
+            {'storyIds': sample(rng, data.story_ids)})},
+        ('group', 'remove_story_from_group'): {'remove_story_from_group': lambda rng: (
+            lambda link: ('delete', f"/groups/{link[0]}/remove_story_from_group",
+                          {'storyId': link[1]}))(pick(rng, group_links))},
+        ('user', 'list'): {'list': lambda rng: ('get', "/users", None)},
+        ('user', 'retrieve'): {'retrieve': lambda rng: (
+            'get', f"/users/{pick(rng, data.user_ids)}", None)},
+        ('user', 'create'): {'create': lambda rng: (
+            'post', "/users", {'name': 'benchmark', 'bio': 'benchmark', 'uid': 'benchmark'})},
+        ('user', 'update'): {'update': lambda rng: (
+            'put', f"/users/{pick(rng, data.user_ids)}",
+            {'name': 'benchmark', 'bio': 'benchmark', 'uid': 'benchmark'})},
+        ('user', 'destroy'): {'destroy': lambda rng: (
+            'delete', f"/users/{pick(rng, data.user_ids)}", None)},
+        ('individualstory', 'list'): {
+            'list': lambda rng: ('get', "/individualstorys", None),
+            'list?fields=id,story.name': lambda rng: (
+                'get', "/individualstorys?fields=id,story.name", None),
+        },
+        ('individualstory', 'retrieve'): {'retrieve': lambda rng: (
+            'get', f"/individualstorys/{IndividualStory.objects.values_list('id', flat=True).first()}", None)},
+        ('individualstory', 'destroy'): {'destroy': lambda rng: (
+            'delete', f"/individualstorys/{IndividualStory.objects.values_list('id', flat=True).first()}", None)},
+        ('individualstory', 'stories_by_individual'): {'stories_by_individual': lambda rng: (
+            'get', f"/individualstorys/stories_by_individual?individual_id={pick(rng, individual_links)[0]}", None)},
+        ('individualstory', 'individuals_by_stories'): {'individuals_by_stories': lambda rng: (
+            'get', f"/individualstorys/individuals_by_stories?story_id={pick(rng, individual_links)[1]}", None)},
+        ('groupstory', 'list'): {'list': lambda rng: ('get', "/groupstorys", None)},
+        ('groupstory', 'retrieve'): {'retrieve': lambda rng: (
+            'get', f"/groupstorys/{GroupStory.objects.values_list('id', flat=True).first()}", None)},
+        ('groupstory', 'stories_by_group'): {'stories_by_group': lambda rng: (
+            'get', f"/groupstorys/stories_by_group?group_id={pick(rng, group_links)[0]}", None)},
+        ('groupstory', 'groups_by_stories'): {'groups_by_stories': lambda rng: (
+            'get', f"/groupstorys/groups_by_stories?story_id={pick(rng, group_links)[1]}", None)},
+    })
+    return table
+
+
+def router_actions():
+    """Yields (basename, action) for every routed ViewSet action"""
+    for _, viewset, basename in router.registry:
+        for action in STANDARD_ACTIONS:
+            if hasattr(viewset, action):
+                yield basename, action
+        for extra in viewset.get_extra_actions():
+            yield basename, extra.__name__
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run_one(client, factory, requests, seed):
+    rng = random.Random(seed)
+    timings, queries, sizes, statuses = [], [], [], set()
+    for _ in range(requests):
+        method, path, body = factory(rng)
+        with CaptureQueriesContext(connection) as captured, transaction.atomic():
+            start = time.perf_counter()
+            response = client.generic(
+                method.upper(), path, json.dumps(body) if body is not None else '',
+                content_type='application/json')
+            content = (b''.join(response.streaming_content)
+                       if response.streaming else response.content)
+            timings.append((time.perf_counter() - start) * 1000)
+            transaction.set_rollback(True)
+        # The outer atomic block adds SAVEPOINT/RELEASE or BEGIN/ROLLBACK
+        queries.append(len([query for query in captured.captured_queries
+                            if not query['sql'].startswith(('SAVEPOINT', 'RELEASE', 'BEGIN', 'ROLLBACK'))]))
+        sizes.append(len(content))
+        statuses.add(response.status_code)
+
+    timings.sort()
+    return {
+        'method': method.upper(),
+        'status': sorted(statuses),
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'queries': round(sum(queries) / len(queries), 2),
+        'bytes': round(sum(sizes) / len(sizes)),
+    }
+
+
+def compare(results, path):
+    previous = {(row['viewset'], row['label']): row
+                for row in json.loads(Path(path).read_text())['results']}
+    print(f"\ncompared with {path}")
+    print(f"{'viewset':<16} {'label':<30} {'p50':>14} {'p95':>14} {'queries':>12}")
+    for row in results:
+        old = previous.get((row['viewset'], row['label']))
+        if old is None:
+            continue
+        print(f"{row['viewset']:<16} {row['label']:<30} "
+              f"{row['p50_ms'] / max(old['p50_ms'], 1e-9):>13.2f}x "
+              f"{row['p95_ms'] / max(old['p95_ms'], 1e-9):>13.2f}x "
+              f"{old['queries']:>5} -> {row['queries']:<5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    dataset.add_arguments(parser)
+    parser.add_argument('--requests', type=int, default=50,
+                        help='requests per endpoint')
+    parser.add_argument('--cache', action='store_true',
+                        help='leave the response cache on (off by default)')
+    parser.add_argument('--only', help='substring filter on viewset/label')
+    parser.add_argument('--output', type=Path,
+                        help='where to save the JSON results')
+    parser.add_argument('--compare', help='previous JSON results to diff against')
+    args = parser.parse_args()
+
+    with test_database(), override_settings(LWL_RESPONSE_CACHE=args.cache):
+        start = time.perf_counter()
+        data = dataset.generate_from_args(args)
+        print(f"dataset generated in {time.perf_counter() - start:.1f} s")
+
+        table = scenarios(data)
+        client = APIClient()
+        results = []
+        print(f"{'viewset':<16} {'label':<30} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+              f"{'queries':>8} {'bytes':>11}  status")
+        for basename, action in router_actions():
+            if (basename, action) in UNSUPPORTED:
+                continue
+            if (basename, action) not in table:
+                print(f"{basename:<16} {action:<30} no scenario defined")
+                continue
+            for label, factory in table[(basename, action)].items():
+                if args.only and args.only not in f"{basename} {label}":
+                    continue
+                row = {'viewset': basename, 'action': action, 'label': label,
+                       **run_one(client, factory, args.requests, args.seed)}
+                results.append(row)
+                print(f"{basename:<16} {label:<30} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+                      f"{row['p99_ms']:>9.2f} {row['queries']:>8} {row['bytes']:>11,}  {row['status']}")
+
+    output = args.output or RESULTS_DIR / f"endpoints-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'arguments': {key: str(value) for key, value in vars(args).items()},
+        },
+        'results': results,
+    }, indent=2))
+    print(f"\nresults saved to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
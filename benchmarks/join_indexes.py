@@ -0,0 +1,111 @@
+"""Before/after benchmark for the IndividualStory and GroupStory indexes
+
+    python -m benchmarks.join_indexes [--links 1000000]
+
+Builds a throwaway in-memory database at migration 0001, fills both join
+tables with random links (about 1% of them duplicated), and prints the
+EXPLAIN QUERY PLAN and latency of the lookups the views run. It then
+migrates forward, which removes the duplicates and adds the unique
+composite indexes, and runs the same lookups again.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from django.core.management import call_command
+from django.db import connection
+from lwlapi.models import GroupStory, IndividualStory
+from benchmarks import test_database
+
+LINK_MODELS = (
+    (IndividualStory, 'individual', 'lwlapi_individual'),
+    (GroupStory, 'group', 'lwlapi_group'),
+)
+
+
+def seed(links, owners, stories, rng):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO lwlapi_user (name, bio, uid) VALUES ('bench', '', 'bench')")
+        user_id = cursor.lastrowid
+        rows = [(f"story {i}", '', '', user_id) for i in range(stories)]
+        cursor.executemany(
+            "INSERT INTO lwlapi_story (name, description, type, uid_id) VALUES (%s, %s, %s, %s)", rows)
+
+        for model, owner, owner_table in LINK_MODELS:
+            rows = [(f"{owner} {i}", '', '', user_id) for i in range(owners)]
+            cursor.executemany(
+                f"INSERT INTO {owner_table} (name, description, type, uid_id) VALUES (%s, %s, %s, %s)", rows)
+
+            pairs = [(rng.randint(1, owners), rng.randint(1, stories))
+                     for _ in range(links)]
+            pairs += rng.sample(pairs, links // 100)
+            cursor.executemany(
+                f"INSERT INTO {model._meta.db_table} ({owner}_id, story_id) VALUES (%s, %s)", pairs)
+
+
+def lookups(model, owner, owners, stories):
+    related = model.objects.select_related(owner, 'story')
+    return {
+        f"{owner}s_by_stories": lambda rng: list(
+            related.filter(story_id=rng.randint(1, stories))),
+        f"stories_by_{owner}": lambda rng: list(
+            related.filter(**{f"{owner}_id": rng.randint(1, owners)})),
+        'link_exists': lambda rng: model.objects.filter(
+            **{f"{owner}_id": rng.randint(1, owners)},
+            story_id=rng.randint(1, stories)).exists(),
+    }
+
+
+def explain(model, owner):
+    related = model.objects.select_related(owner, 'story')
+    return {
+        f"{owner}s_by_stories": related.filter(story_id=1).explain(),
+        f"stories_by_{owner}": related.filter(**{f"{owner}_id": 1}).explain(),
+        'link_exists': model.objects.filter(
+            **{f"{owner}_id": 1}, story_id=1).explain(),
+    }
+
+
+def measure(label, owners, stories, runs):
+    print(f"\n=== {label}")
+    for model, owner, _ in LINK_MODELS:
+        print(f"\n{model.__name__}: {model.objects.count()} rows")
+        plans = explain(model, owner)
+        for name, query in lookups(model, owner, owners, stories).items():
+            rng = random.Random(0)
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                query(rng)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            print(f"  {name}: p50 {statistics.median(timings):.3f} ms, "
+                  f"p95 {timings[int(len(timings) * 0.95)]:.3f} ms")
+            for line in plans[name].splitlines():
+                print(f"    {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--links', type=int, default=1_000_000)
+    parser.add_argument('--owners', type=int, default=20_000)
+    parser.add_argument('--stories', type=int, default=20_000)
+    parser.add_argument('--runs', type=int, default=500)
+    args = parser.parse_args()
+
+    with test_database():
+        call_command('migrate', 'lwlapi', '0001', verbosity=0)
+        seed(args.links, args.owners, args.stories, random.Random(0))
+        measure('before (0001_initial)', args.owners, args.stories, args.runs)
+
+        start = time.perf_counter()
+        call_command('migrate', 'lwlapi', verbosity=0)
+        print(f"\nmigrating forward took {time.perf_counter() - start:.1f} s")
+        measure('after (unique composite indexes)',
+                args.owners, args.stories, args.runs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Encode/decode time and payload size of the JSON and MessagePack
+renderers and parsers
+
+    python -m benchmarks.renderers [--rows 10000] [--repeat 5]
+
+Renders a `--rows` story list response (as StoryView.list returns it)
+and parses a bulk-import request body of --bulk items, with DRF's
+JSONRenderer/JSONParser, lwlapi's orjson ones and MessagePack (when
+installed), best of `--repeat` runs.
+"""
+import argparse
+import io
+import time
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from lwlapi.fastpath import serialize_values
+from lwlapi.parsers import MessagePackParser, ORJSONParser
+from lwlapi.renderers import MessagePackRenderer, ORJSONRenderer, msgpack
+from lwlapi.views import StorySerializer
+from lwlapi.models import Story
+from benchmarks import test_database
+from benchmarks.serializers import best_of, seed
+
+
+def formats():
+    yield 'json (DRF)', JSONRenderer(), JSONParser()
+    yield 'json (orjson)', ORJSONRenderer(), ORJSONParser()
+    if msgpack is not None:
+        yield 'msgpack', MessagePackRenderer(), MessagePackParser()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--bulk', type=int, default=1_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with test_database():
+        seed(args.rows)
+        stories = serialize_values(Story.objects.all(), StorySerializer)
+    items = [{'name': story['name'], 'uid': f"uid-{story['uid']}",
+              'description': story['description'], 'type': story['type'],
+              'external_id': f"import-{story['id']}"} for story in stories[:args.bulk]]
+
+    print(f"{'format':<14} {'payload':<14} {'encode ms':>10} {'decode ms':>10} {'bytes':>12}")
+    for name, renderer, body_parser in formats():
+        for payload, data in ((f'list x{len(stories)}', stories), (f'bulk x{len(items)}', items)):
+            body = renderer.render(data)
+            encode = best_of(args.repeat, lambda: renderer.render(data))
+            decode = best_of(args.repeat, lambda: body_parser.parse(io.BytesIO(body)))
+            print(f"{name:<14} {payload:<14} {encode * 1000:>10.2f} {decode * 1000:>10.2f} "
+                  f"{len(body):>12,}")
+
+
+if __name__ == '__main__':
+    main()
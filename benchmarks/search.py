@@ -0,0 +1,69 @@
+"""Latency of /search against a production-sized index
+
+    python -m benchmarks.search [--requests 200] [dataset options]
+
+Generates a seeded dataset in a throwaway database (the index is kept in
+sync row by row while it is inserted), times a full rebuild with
+`manage.py rebuild_search_index`, then calls /search through the Django
+test client with a few kinds of query:
+
+- selective: a dataset word plus a row number, matching a handful of rows
+- common: two dataset words, matching a large share of all rows
+- prefix: the first letters of a dataset word
+- scoped: two dataset words within one user's rows
+"""
+import argparse
+import random
+import time
+from io import StringIO
+
+from django.core.management import call_command
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+from benchmarks import dataset, test_database
+from benchmarks.endpoints import percentile
+
+QUERIES = {
+    'selective': lambda rng, data: {
+        'q': f"{rng.choice(dataset.WORDS)} {rng.randrange(len(data.story_ids))}"},
+    'common': lambda rng, data: {'q': ' '.join(rng.sample(dataset.WORDS, 2))},
+    'prefix': lambda rng, data: {'q': rng.choice(dataset.WORDS)[:3]},
+    'scoped': lambda rng, data: {'q': ' '.join(rng.sample(dataset.WORDS, 2)),
+                                 'uid': rng.choice(data.user_ids)},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    dataset.add_arguments(parser)
+    parser.add_argument('--requests', type=int, default=200,
+                        help='requests per kind of query')
+    args = parser.parse_args()
+
+    with test_database(), override_settings(LWL_RESPONSE_CACHE=False):
+        start = time.perf_counter()
+        data = dataset.generate_from_args(args)
+        print(f"dataset generated and indexed in {time.perf_counter() - start:.1f} s")
+
+        start = time.perf_counter()
+        call_command('rebuild_search_index', stdout=StringIO())
+        print(f"index rebuilt in {time.perf_counter() - start:.1f} s")
+
+        client = APIClient()
+        print(f"{'query':<10} {'p50 ms':>9} {'p99 ms':>9} {'results':>8}")
+        for label, factory in QUERIES.items():
+            rng = random.Random(args.seed)
+            timings, results = [], 0
+            for _ in range(args.requests):
+                params = factory(rng, data)
+                start = time.perf_counter()
+                response = client.get('/search', params)
+                timings.append((time.perf_counter() - start) * 1000)
+                results += len(response.data['results'])
+            timings.sort()
+            print(f"{label:<10} {percentile(timings, 0.50):>9.2f} "
+                  f"{percentile(timings, 0.99):>9.2f} {results / args.requests:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
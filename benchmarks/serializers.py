@@ -0,0 +1,57 @@
+"""Rows per second of the ModelSerializer and values_list() list paths
+
+    python -m benchmarks.serializers [--rows 10000] [--repeat 5]
+
+Fills a throwaway database with `--rows` rows of each model and times
+serializing the whole table both ways, best of `--repeat` runs.
+"""
+import argparse
+import time
+
+from lwlapi.fastpath import serialize_values
+from lwlapi.models import Group, Individual, Story, User
+from lwlapi.views import GroupSerializer, IndividualSerializer, StorySerializer, UserSerializer
+from benchmarks import test_database
+
+
+def seed(rows):
+    users = User.objects.bulk_create(
+        User(name=f"user {i}", bio="bio " * 20, uid=f"uid-{i}") for i in range(rows))
+    for model in (Story, Individual, Group):
+        model.objects.bulk_create(
+            model(name=f"{model.__name__} {i}", uid=users[i % len(users)],
+                  description="description " * 20, type="type")
+            for i in range(rows))
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with test_database():
+        seed(args.rows)
+        print(f"{'serializer':<22} {'ModelSerializer':>16} {'values_list':>16} {'speedup':>8}")
+        for model, serializer_class in ((Story, StorySerializer),
+                                        (Individual, IndividualSerializer),
+                                        (Group, GroupSerializer),
+                                        (User, UserSerializer)):
+            queryset = model.objects.all()
+            slow = best_of(args.repeat, lambda: serializer_class(queryset.all(), many=True).data)
+            fast = best_of(args.repeat, lambda: serialize_values(queryset.all(), serializer_class))
+            print(f"{serializer_class.__name__:<22} {args.rows / slow:>12,.0f} r/s "
+                  f"{args.rows / fast:>12,.0f} r/s {slow / fast:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""Read and write throughput of the SQLite connection profile under load
+
+    python -m benchmarks.sqlite_profile [--threads 8] [--duration 10]
+                                        [--write-ratio 0.2] [dataset options]
+
+Builds a seeded SQLite file, copies it, and runs the same threaded
+workload against each copy: the default Django sqlite3 backend (rollback
+journal, deferred transactions, a new connection per request) and the
+DATABASES['default'] profile from lwl/settings.py. Reads list one user's
+stories; writes link a story to individuals the way
+add_individual_to_story does (a read, then a bulk insert, in one
+transaction). Reports operations per second and "database is locked"
+errors for each.
+"""
+import argparse
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import OperationalError, connections, transaction
+from lwlapi.models import IndividualStory, Story
+from benchmarks import dataset
+from benchmarks.concurrency import build_database
+
+
+def profiles(directory, source):
+    """Returns {alias: settings} for a copy of the database per profile"""
+    default = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'CONN_MAX_AGE': 0,
+    }
+    profile = {key: value for key, value in settings.DATABASES['default'].items()
+               if key != 'NAME'}
+    result = {}
+    for alias, config in (('before', default), ('after', profile)):
+        path = Path(directory) / f'{alias}.sqlite3'
+        shutil.copyfile(source, path)
+        result[alias] = {**config, 'NAME': str(path)}
+    # The seeding run used the WAL profile, and journal_mode is stored in
+    # the file, so put the baseline back to the default rollback journal.
+    with sqlite3.connect(result['before']['NAME']) as db:
+        db.execute('PRAGMA journal_mode = delete')
+    return result
+
+
+def worker(alias, deadline, rng, ids, write_ratio, counts, lock):
+    connection = connections[alias]
+    reads = writes = errors = 0
+    while time.perf_counter() < deadline:
+        # What Django does around each request
+        connection.close_if_unusable_or_obsolete()
+        try:
+            if rng.random() < write_ratio:
+                story_id = rng.choice(ids['story'])
+                individual_ids = rng.sample(ids['individual'], 10)
+                with transaction.atomic(using=alias):
+                    linked = set(IndividualStory.objects.using(alias).filter(
+                        story_id=story_id, individual_id__in=individual_ids
+                    ).values_list('individual_id', flat=True))
+                    IndividualStory.objects.using(alias).bulk_create([
+                        IndividualStory(story_id=story_id, individual_id=pk)
+                        for pk in individual_ids if pk not in linked
+                    ], ignore_conflicts=True)
+                writes += 1
+            else:
+                list(Story.objects.using(alias).filter(
+                    uid=rng.choice(ids['user'])).values_list('id', 'name'))
+                reads += 1
+        except OperationalError as ex:
+            if 'locked' not in str(ex):
+                raise
+            errors += 1
+    connection.close()
+    with lock:
+        counts['reads'] += reads
+        counts['writes'] += writes
+        counts['errors'] += errors
+
+
+def run(alias, ids, args):
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+    threads = [threading.Thread(target=worker, args=(
+        alias, deadline, random.Random(args.seed + n), ids, args.write_ratio, counts, lock))
+        for n in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {key: value / args.duration if key != 'errors' else value
+            for key, value in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    dataset.add_arguments(parser)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10,
+                        help='seconds per profile')
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = Path(directory) / 'seed.sqlite3'
+        build_database(source, args)
+        with sqlite3.connect(source) as db:
+            ids = {
+                'user': [row[0] for row in db.execute('SELECT id FROM lwlapi_user')],
+                'story': [row[0] for row in db.execute('SELECT id FROM lwlapi_story')],
+                'individual': [row[0] for row in db.execute('SELECT id FROM lwlapi_individual')],
+            }
+
+        configured = connections.configure_settings(
+            {'default': settings.DATABASES['default'], **profiles(directory, source)})
+        connections.settings.update(configured)
+
+        print(f"{'profile':<8} {'reads/s':>10} {'writes/s':>10} {'locked errors':>14}")
+        for alias in ('before', 'after'):
+            row = run(alias, ids, args)
+            print(f"{alias:<8} {row['reads']:>10.1f} {row['writes']:>10.1f} {row['errors']:>14}")
+
+
+if __name__ == '__main__':
+    main()
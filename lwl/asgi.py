@@ -9,8 +9,49 @@ https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lwl.settings')
 
+_END = object()
+
+
+class StreamingASGIHandler(ASGIHandler):
+    """Django's ASGI handler, reading streamed bodies off the event loop
+
+    Every view is the synchronous DRF view, which Django runs in a
+    thread. Django 4.1 iterates a streamed body on the event loop itself,
+    where the ORM refuses to run, so ?stream= lists could not read their
+    rows there. Each part is pulled on the request's thread instead.
+    """
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [
+                *((str(header).encode('ascii'), str(value).encode('latin1'))
+                  for header, value in response.items()),
+                *((b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+                  for cookie in response.cookies.values()),
+            ],
+        })
+        parts = iter(response)
+        next_part = sync_to_async(next, thread_sensitive=True)
+        while (part := await next_part(parts, _END)) is not _END:
+            for chunk, _ in self.chunk_bytes(part):
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive=True)()
+
+
+def get_asgi_application():
+    django.setup(set_prefix=False)
+    return StreamingASGIHandler()
+
+
 application = get_asgi_application()
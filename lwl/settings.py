@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 
+import importlib.util
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,6 +49,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'lwlapi.middleware.metrics_middleware',
+    'lwlapi.middleware.compression_middleware',
+    'lwlapi.middleware.query_stats_middleware',
+    'lwlapi.middleware.replica_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,6 +72,25 @@ MIDDLEWARE = [
 #     ],
 # }
 
+# JSON is encoded and decoded with orjson (see lwlapi/renderers.py); clients
+# that send or accept application/msgpack get MessagePack if it is installed
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'lwlapi.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'lwlapi.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+if importlib.util.find_spec('msgpack') is not None:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].insert(1, 'lwlapi.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].insert(1, 'lwlapi.parsers.MessagePackParser')
+
+CORS_EXPOSE_HEADERS = ['ETag', 'X-Primary-Until', 'X-DB-Queries']
+
 CORS_ORIGIN_WHITELIST = (
     'http://localhost:3000',
     'http://127.0.0.1:3000'
@@ -95,13 +120,136 @@ WSGI_APPLICATION = 'lwl.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
 
-DATABASES = {
+# LWL_DB_ENGINE picks the database: 'sqlite' (default) or 'postgresql'.
+#
+# lwlapi.backends.sqlite3 applies OPTIONS['pragmas'] to every new connection
+# and begins atomic() blocks with OPTIONS['transaction_mode'].
+# Connections are kept for CONN_MAX_AGE seconds and checked before reuse.
+#
+# lwlapi.backends.postgresql (needs psycopg2) returns connections to a
+# per-process pool of OPTIONS['pool']['max_size'] at the end of every request.
+
+if os.environ.get('LWL_DB_ENGINE', 'sqlite') == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'lwlapi.backends.postgresql',
+            'NAME': os.environ.get('LWL_DB_NAME', 'lwl'),
+            'USER': os.environ.get('LWL_DB_USER', ''),
+            'PASSWORD': os.environ.get('LWL_DB_PASSWORD', ''),
+            'HOST': os.environ.get('LWL_DB_HOST', ''),
+            'PORT': os.environ.get('LWL_DB_PORT', ''),
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': {
+                'pool': {
+                    'max_size': int(os.environ.get('LWL_DB_POOL_SIZE', 10)),
+                    'timeout': 10,
+                },
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'lwlapi.backends.sqlite3',
+            'NAME': os.environ.get('LWL_SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': int(os.environ.get('LWL_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pragmas': {
+                    'journal_mode': 'wal',
+                    'synchronous': 'normal',
+                    'busy_timeout': 5000,
+                    'cache_size': -64000,
+                    'mmap_size': 268435456,
+                    'temp_store': 'memory',
+                },
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+
+# Read replicas: LWL_DB_REPLICAS is a comma-separated list of SQLite files or,
+# with PostgreSQL, of host[:port] serving a replica of the same database.
+# lwlapi.routers sends safe requests there, except from clients that wrote
+# within the last LWL_READ_YOUR_WRITES_SECONDS.
+
+for number, replica in enumerate(filter(None, os.environ.get('LWL_DB_REPLICAS', '').split(','))):
+    config = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+    if config['ENGINE'] == 'lwlapi.backends.postgresql':
+        config['HOST'], _, config['PORT'] = replica.partition(':')
+    else:
+        config['NAME'] = replica
+    DATABASES[f'replica_{number}'] = config
+
+DATABASE_ROUTERS = ['lwlapi.routers.ReplicaRouter']
+LWL_READ_YOUR_WRITES_SECONDS = int(os.environ.get('LWL_READ_YOUR_WRITES_SECONDS', 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+# Any Django backend works; use 'django.core.cache.backends.filebased.FileBasedCache'
+# with a shared LOCATION directory to share cached responses between workers.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lwl',
+        'TIMEOUT': 300,
     }
 }
 
+# Serve repeat GETs on the story/individual/group/user views from CACHES
+LWL_RESPONSE_CACHE = True
+
+# Query count and database time per request, as response headers and DEBUG
+# log lines from lwlapi.middleware (see query_stats_middleware)
+LWL_QUERY_STATS = os.environ.get('LWL_QUERY_STATS', '1' if DEBUG else '0') == '1'
+
+# Opt-in: statements slower than LWL_SLOW_QUERY_MS milliseconds (default 0,
+# off) are logged with their plan and parameters, which hold user data, to
+# the rotating JSON-lines file LWL_SLOW_QUERY_LOG, or to stderr when it is not
+# set; `manage.py slow_queries` summarizes the file (see lwlapi/instrumentation.py)
+LWL_SLOW_QUERY_MS = float(os.environ.get('LWL_SLOW_QUERY_MS', 0))
+LWL_SLOW_QUERY_LOG = os.environ.get('LWL_SLOW_QUERY_LOG')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': LWL_SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'message',
+        } if LWL_SLOW_QUERY_LOG else {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'lwlapi.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Per-view request metrics on /metrics; with several worker processes, point
+# LWL_METRICS_DIR at a directory they share (see lwlapi/metrics.py)
+LWL_METRICS = os.environ.get('LWL_METRICS', '1') == '1'
+LWL_METRICS_DIR = os.environ.get('LWL_METRICS_DIR')
+
+# gzip, br and zstd responses for bodies of LWL_COMPRESS_MIN_BYTES or more;
+# br and zstd need the brotli and zstandard packages (see lwlapi/compression.py)
+LWL_COMPRESSION = os.environ.get('LWL_COMPRESSION', '1') == '1'
+LWL_COMPRESS_MIN_BYTES = int(os.environ.get('LWL_COMPRESS_MIN_BYTES', 1024))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
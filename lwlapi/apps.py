@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
 
 
 class AppApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'lwlapi'
+
+    def ready(self):
+        from lwlapi import caching, instrumentation
+        from lwlapi.models import Group, Individual, Story, User
+        connection_created.connect(instrumentation.install)
+        # Keeps the response cache current for writes made outside the API
+        for model in (Story, Individual, Group, User):
+            post_save.connect(caching.invalidate_instance, sender=model)
+            post_delete.connect(caching.invalidate_instance, sender=model)
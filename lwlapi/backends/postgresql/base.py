@@ -0,0 +1,131 @@
+"""PostgreSQL backend that hands out connections from a per-process pool
+
+Django 4.1 opens a connection per thread and, with CONN_MAX_AGE = 0,
+closes it at the end of every request. Here close() returns it to a pool
+shared by every thread of the process instead, and connect() takes an
+idle one back, so requests skip the TCP/auth handshake and the number of
+server connections stays at OPTIONS['pool']['max_size'] however many
+threads (or ASGI pool threads) the worker runs. A thread that finds the
+pool empty waits up to OPTIONS['pool']['timeout'] seconds.
+
+Connections that sat idle for more than 'check_after' seconds are
+pinged before being handed out again.
+"""
+import os
+import queue
+import threading
+import time
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+from .creation import DatabaseCreation
+
+DEFAULT_POOL = {'max_size': 10, 'timeout': 10, 'check_after': 30}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """A bounded LIFO pool of psycopg2 connections to one database"""
+
+    def __init__(self, max_size, timeout, check_after):
+        self.timeout = timeout
+        self.check_after = check_after
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def _usable(self, connection, idle_since):
+        if connection.closed:
+            return False
+        if time.monotonic() - idle_since < self.check_after:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except base.Database.Error:
+            return False
+
+    def acquire(self, connect):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise base.Database.OperationalError(
+                f"No free database connection in the pool after {self.timeout} s.")
+        try:
+            while True:
+                try:
+                    connection, idle_since = self._idle.get_nowait()
+                except queue.Empty:
+                    return connect()
+                if self._usable(connection, idle_since):
+                    return connection
+                connection.close()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection):
+        try:
+            if connection.closed:
+                return
+            if connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            self._idle.put((connection, time.monotonic()))
+        except base.Database.Error:
+            connection.close()
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            connection.close()
+
+
+def close_pools():
+    """Closes every idle pooled connection, e.g. before dropping a database"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop('pool', None)
+        return kwargs
+
+    def _pool(self, conn_params):
+        # Forked workers must not share the parent's sockets
+        key = (os.getpid(), tuple(sorted((name, str(value)) for name, value in conn_params.items())))
+        with _pools_lock:
+            if key not in _pools:
+                _pools[key] = ConnectionPool(
+                    **{**DEFAULT_POOL, **self.settings_dict['OPTIONS'].get('pool', {})})
+            return _pools[key]
+
+    def get_new_connection(self, conn_params):
+        new = []
+
+        def connect():
+            new.append(True)
+            return super(DatabaseWrapper, self).get_new_connection(conn_params)
+
+        connection = self._pool(conn_params).acquire(connect)
+        if not new:
+            # What get_new_connection() sets up on a fresh connection
+            self.isolation_level = self.settings_dict['OPTIONS'].get(
+                'isolation_level', connection.isolation_level)
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self._pool(self.get_connection_params()).release(self.connection)
@@ -0,0 +1,10 @@
+from django.db.backends.postgresql.creation import DatabaseCreation as BaseDatabaseCreation
+
+
+class DatabaseCreation(BaseDatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would make DROP DATABASE fail
+        from .base import close_pools
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
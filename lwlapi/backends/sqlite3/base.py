@@ -0,0 +1,36 @@
+"""SQLite backend with a production connection profile
+
+Accepts two extra OPTIONS on top of Django's sqlite3 backend:
+
+    'pragmas': {'journal_mode': 'wal', 'busy_timeout': 5000, ...}
+        applied, in order, to every new connection.
+    'transaction_mode': 'IMMEDIATE'
+        how atomic() blocks begin. Django's default deferred BEGIN takes
+        the write lock only at the first write, and two connections that
+        both read first then fail at once with "database is locked"
+        instead of waiting busy_timeout for each other.
+"""
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        kwargs.pop('transaction_mode', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict['OPTIONS'].get('pragmas', {}).items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode', 'DEFERRED').upper()
+        if mode not in TRANSACTION_MODES:
+            raise ValueError(f"Unknown SQLite transaction_mode {mode!r}.")
+        self.cursor().execute(f"BEGIN {mode}")
@@ -0,0 +1,116 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from lwlapi.models import User
+
+FIELDS = ('name', 'description', 'type')
+MAX_ITEMS = 10_000
+BATCH_SIZE = 500
+
+
+def _owners(items):
+    """Maps every distinct `uid` of the items to its User id in one query"""
+    uids = {item.get('uid') for item in items if isinstance(item.get('uid'), str)}
+    return {uid: user_id for user_id, uid in
+            User.objects.filter(uid__in=uids).values_list('id', 'uid')}
+
+
+def _validate(model, item, owners, seen):
+    """Builds an unsaved row from one item
+
+    Applies the rules a single create enforces: every field must be
+    present and not null, and within its column's max_length. Blank
+    strings are accepted, as they are there.
+
+    Returns:
+        tuple -- (row, None) or (None, dict of field errors)
+    """
+    if not isinstance(item, dict):
+        return None, {'non_field_errors': ['Expected an object.']}
+
+    errors = {}
+    owner = owners.get(item.get('uid'))
+    if owner is None:
+        errors['uid'] = ['User not found']
+
+    external_id = item.get('external_id')
+    if external_id is not None:
+        external_id = str(external_id)
+        if (owner, external_id) in seen:
+            errors['external_id'] = ['Duplicate external_id in request.']
+        seen.add((owner, external_id))
+
+    values = {'external_id': external_id}
+    for name in FIELDS:
+        values[name] = item.get(name)
+        if values[name] is None:
+            errors[name] = ['This field is required.']
+    for name, value in values.items():
+        if value is None or name in errors:
+            continue
+        field = model._meta.get_field(name)
+        try:
+            values[name] = field.to_python(value)
+            field.run_validators(values[name])
+        except ValidationError as ex:
+            errors[name] = ex.messages
+    return (None, errors) if errors else (model(uid_id=owner, **values), None)
+
+
+def _existing(model, keyed):
+    """Maps (owner id, external_id) of already imported rows to their ids"""
+    existing = {}
+    for start in range(0, len(keyed), BATCH_SIZE):
+        batch = keyed[start:start + BATCH_SIZE]
+        existing.update(
+            ((owner, external_id), pk) for pk, owner, external_id in model.objects.filter(
+                uid_id__in={row.uid_id for row in batch},
+                external_id__in={row.external_id for row in batch},
+            ).values_list('id', 'uid_id', 'external_id'))
+    return existing
+
+
+def bulk_upsert(model, items):
+    """Creates or updates one row of `model` per item in a single transaction
+
+    Items carry the same fields as a single POST, plus an optional
+    `external_id`. An item whose (uid, external_id) already exists updates
+    that row instead, so a retried import does not create duplicates.
+    Nothing is written unless every item is valid.
+
+    Returns:
+        tuple -- (per-item results in request order, ids of the owners
+        that were written to, or None when validation failed)
+    """
+    owners = _owners(items)
+    seen = set()
+    rows, results = [], []
+    for index, item in enumerate(items):
+        row, errors = _validate(model, item, owners, seen)
+        rows.append(row)
+        results.append({'index': index, 'status': 'error', 'errors': errors}
+                       if errors else None)
+    if any(results):
+        for index, result in enumerate(results):
+            results[index] = result or {'index': index, 'status': 'valid'}
+        return results, None
+
+    with transaction.atomic():
+        existing = _existing(model, [row for row in rows if row.external_id is not None])
+        statuses = []
+        for row in rows:
+            row.pk = existing.get((row.uid_id, row.external_id))
+            statuses.append('created' if row.pk is None else 'updated')
+
+        model.objects.bulk_create(
+            [row for row in rows if row.pk is None], batch_size=BATCH_SIZE)
+        model.objects.bulk_update(
+            [row for row, status in zip(rows, statuses) if status == 'updated'],
+            FIELDS, batch_size=BATCH_SIZE)
+
+    results = [{
+        'index': index,
+        'status': status,
+        'id': row.pk,
+        'external_id': row.external_id,
+    } for index, (row, status) in enumerate(zip(rows, statuses))]
+    return results, {row.uid_id for row in rows}
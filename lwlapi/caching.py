@@ -0,0 +1,364 @@
+"""Versioned response cache and ETags for the read endpoints
+
+Every cached response is tied to the version of the user ("owner") whose
+rows it contains. Writes never delete cache keys; they bump the owner's
+version (and the global 'all' version used by unfiltered lists), which
+orphans every older entry at once. Orphans age out through the normal
+cache TIMEOUT.
+
+Saves and deletes of model instances made outside the API (the admin,
+the shell, management commands) bump the same versions through the
+post_save/post_delete receivers connected in apps.py. Writes that send
+no signals, such as QuerySet.update() or raw SQL, are only picked up
+when the version keys expire: they too live for the cache TIMEOUT, and
+a version that comes back starts from a new value. The same bound
+applies between workers that each have their own LocMemCache; use a
+shared cache backend to invalidate every worker at once.
+
+The same versions double as ETag validators, so conditional requests
+can usually be answered without touching the database.
+
+With read replicas, an owner's reads go to the primary for
+LWL_READ_YOUR_WRITES_SECONDS after each write, so neither the cache nor
+an ETag is ever filled from a replica that has not caught up yet.
+"""
+import contextlib
+import contextvars
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+from lwlapi.filtering import integer_param
+from lwlapi.routers import on_primary, replicas, use_replica
+
+ALL = 'all'
+HITS_KEY = 'lwl:stats:hits'
+MISSES_KEY = 'lwl:stats:misses'
+
+_uncommitted = contextvars.ContextVar('lwl_uncommitted', default=False)
+
+
+def _version_key(owner):
+    return f"lwl:version:{owner}"
+
+
+def _written_key(owner):
+    return f"lwl:written:{owner}"
+
+
+def _incr(key, initial, timeout=DEFAULT_TIMEOUT):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, initial, timeout=timeout)
+        return cache.get(key)
+
+
+def get_version(owner):
+    """Returns the current cache version for an owner
+
+    Missing versions start from the clock rather than 0 so a version key
+    that was evicted can never come back with a value an old entry used.
+    """
+    key = _version_key(owner)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns())
+        version = cache.get(key)
+    return version
+
+
+def invalidate(*owners):
+    """Bumps the version of every given owner and of the unfiltered lists
+
+    Inside a transaction the versions are bumped when it commits, and not
+    at all when it rolls back, so no reader can cache rows that were
+    never committed under a version that outlives them. 'all' is bumped
+    first, which store_entry relies on.
+    """
+    owners = [ALL, *dict.fromkeys(str(owner) for owner in owners
+                                  if owner is not None and str(owner) != ALL)]
+    transaction.on_commit(functools.partial(_bump, owners))
+
+
+def _bump(owners):
+    for owner in owners:
+        _incr(_version_key(owner), time.time_ns())
+    if replicas():
+        cache.set_many({_written_key(owner): True for owner in owners},
+                       timeout=settings.LWL_READ_YOUR_WRITES_SECONDS)
+
+
+@contextlib.contextmanager
+def uncommitted():
+    """Marks reads that may see writes not committed yet (an atomic batch)
+
+    Versions are only bumped on commit, so they say nothing about such
+    rows: inside the block the cached views neither read nor fill the
+    cache and send no ETags.
+    """
+    token = _uncommitted.set(True)
+    try:
+        yield
+    finally:
+        _uncommitted.reset(token)
+
+
+def stale_on_replica(owner):
+    """True when this request reads from a replica that may not have the
+    owner's last write yet"""
+    return use_replica.get() and cache.get(_written_key(owner)) is not None
+
+
+def primary_if_written(owner):
+    """Context manager that reads from the primary if stale_on_replica"""
+    return on_primary() if stale_on_replica(owner) else contextlib.nullcontext()
+
+
+def stats():
+    """Returns the hit and miss counters shared by every worker"""
+    counts = cache.get_many([HITS_KEY, MISSES_KEY])
+    return {
+        'hits': counts.get(HITS_KEY, 0),
+        'misses': counts.get(MISSES_KEY, 0),
+    }
+
+
+def record(hit):
+    """Counts one cache hit or miss"""
+    _incr(HITS_KEY if hit else MISSES_KEY, 1, timeout=None)
+
+
+def invalidate_instance(sender, instance, **kwargs):
+    """post_save/post_delete receiver for the cached models
+
+    Invalidates the instance's owner; a User is its own owner.
+    """
+    invalidate(instance.pk if sender._meta.model_name == 'user' else instance.uid_id)
+
+
+def path_hash(request):
+    return hashlib.md5(request.get_full_path().encode()).hexdigest()
+
+
+def make_etag(owner, version, path):
+    """Builds the strong ETag for one owner version of one URL"""
+    return f'"{owner}-{version}-{path[:16]}"'
+
+
+def _opaque(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def matches(header, etag):
+    """True when an If-None-Match header matches the ETag
+
+    Compared weakly, as RFC 7232 asks for If-None-Match: compressed
+    responses carry the same ETag marked weak (W/"..."), and clients send
+    that back.
+    """
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in parse_etags(header)}
+
+
+def matches_strong(header, etag):
+    """True when an If-Match header matches the ETag
+
+    Compared strongly (RFC 7232 section 3.1): a weak tag never matches.
+    """
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return not etag.startswith('W/') and etag in parse_etags(header)
+
+
+def list_key(model, etag):
+    return f"lwl:{model._meta.model_name}:list:{etag}"
+
+
+def retrieve_key(model, path):
+    return f"lwl:{model._meta.model_name}:retrieve:{path}"
+
+
+def fresh_entry(key):
+    """Returns a cached retrieve entry if its owner's version is unchanged"""
+    entry = cache.get(key)
+    if entry is not None and entry['version'] == get_version(entry['owner']):
+        return entry
+    return None
+
+
+def store_entry(key, owner, path, data, read_at):
+    """Caches a retrieve response under its owner's current version
+
+    The owner of a row is only known once the row has been read, so
+    read_at is the 'all' version read before it. Every write bumps 'all'
+    before the owner's version; when it still equals read_at after the
+    owner's version was read, no write came in between and the data is
+    what that version describes. Otherwise nothing is cached and the
+    response gets no ETag.
+
+    Returns:
+        str -- the response's ETag, or None
+    """
+    version = get_version(owner)
+    if get_version(ALL) != read_at:
+        return None
+    if use_cache():
+        cache.set(key, {'owner': owner, 'version': version, 'data': data})
+    return make_etag(owner, version, path)
+
+
+def use_cache():
+    return getattr(settings, 'LWL_RESPONSE_CACHE', True)
+
+
+def _cached(response, etag):
+    response['ETag'] = etag
+    response['X-Cache'] = 'HIT'
+    record(True)
+    return response
+
+
+def _not_modified(etag):
+    response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    response['ETag'] = etag
+    return response
+
+
+def _owner_of(model, owner_field, pk):
+    return model.objects.filter(pk=pk).values_list(owner_field, flat=True).first()
+
+
+def cached_response(model, owner_field='uid', owner_param='uid'):
+    """Caches successful list/retrieve responses of a ViewSet method
+
+    Lists are keyed by their integer `owner_param` query filter (or 'all'
+    when it is absent or owner_param is None) and that owner's version; a
+    filter that is not an integer is answered with 400. Retrieves
+    store the owner read from `owner_field` of the object alongside the
+    data and are only served while that owner's version is unchanged.
+
+    Responses carry an ETag built from the same owner version, and a
+    matching If-None-Match is answered with 304 before any serialization.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if _uncommitted.get():
+                return method(self, request, *args, **kwargs)
+            caching = use_cache()
+            if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+            path = path_hash(request)
+            pk = kwargs.get('pk')
+
+            if pk is None:
+                try:
+                    uid = integer_param(request.query_params, owner_param) if owner_param else None
+                except ValueError as ex:
+                    return Response({'message': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
+                # The id as invalidate() writes it, however the client spelled it
+                owner = ALL if uid is None else str(uid)
+                etag = make_etag(owner, get_version(owner), path)
+                if matches(if_none_match, etag):
+                    return _not_modified(etag)
+
+                key = list_key(model, etag)
+                data = cache.get(key) if caching else None
+                if data is not None:
+                    return _cached(Response(data), etag)
+            else:
+                key = retrieve_key(model, path)
+                entry = fresh_entry(key) if caching else None
+                if entry is not None:
+                    etag = make_etag(entry['owner'], entry['version'], path)
+                    if matches(if_none_match, etag):
+                        return _not_modified(etag)
+                    return _cached(Response(entry['data']), etag)
+
+                if if_none_match:
+                    owner = _owner_of(model, owner_field, pk)
+                    if owner is not None:
+                        etag = make_etag(owner, get_version(owner), path)
+                        if matches(if_none_match, etag):
+                            return _not_modified(etag)
+
+                read_at = get_version(ALL)
+
+            with primary_if_written(ALL if pk is not None else owner):
+                response = method(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                if pk is not None:
+                    owner = response.data.get(owner_field)
+                    if isinstance(owner, dict):
+                        # Embedded with ?expand=
+                        owner = owner.get('id')
+                    if owner is None:
+                        owner = _owner_of(model, owner_field, pk)
+                    etag = store_entry(key, owner, path, response.data, read_at)
+                elif caching and not response.streaming:
+                    cache.set(key, response.data)
+                if etag is not None:
+                    response['ETag'] = etag
+
+            if caching:
+                record(False)
+                response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_response(method):
+    """Adds ETag/If-None-Match support to a read action without caching it
+
+    For endpoints whose rows span owners (the join tables and the story
+    graph); they are validated against the global 'all' version.
+    """
+    @functools.wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        if _uncommitted.get():
+            return method(self, request, *args, **kwargs)
+        etag = make_etag(ALL, get_version(ALL), path_hash(request))
+        if matches(request.META.get('HTTP_IF_NONE_MATCH'), etag):
+            return _not_modified(etag)
+
+        with primary_if_written(ALL):
+            response = method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+        return response
+    return wrapper
+
+
+def if_match(model, owner_field='uid'):
+    """Rejects a write with 412 when its If-Match header is out of date
+
+    The header is compared with the ETag a GET of the same URL would
+    return, so clients can send what they last read instead of reading
+    again before writing.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            header = request.META.get('HTTP_IF_MATCH')
+            if header and header.strip() != '*':
+                owner = _owner_of(model, owner_field, kwargs['pk'])
+                if owner is not None and not matches_strong(
+                        header, make_etag(owner, get_version(owner), path_hash(request))):
+                    return Response({'message': 'Precondition failed'},
+                                    status=status.HTTP_412_PRECONDITION_FAILED)
+            return method(self, request, *args, **kwargs)
+        return wrapper
+    return decorator
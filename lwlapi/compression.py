@@ -0,0 +1,124 @@
+"""Response compression: gzip, plus Brotli and Zstandard when the brotli
+and zstandard packages are installed
+
+compression_middleware (lwlapi/middleware.py) answers with the encoding
+the client accepts with the highest q-value, preferring zstd, then br,
+then gzip on ties. Bodies shorter than LWL_COMPRESS_MIN_BYTES are sent
+as they are.
+
+Streamed responses are compressed chunk by chunk and each chunk is
+flushed, so the client gets every chunk as early as it would have
+uncompressed, and the body is never held in memory whole.
+"""
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP_LEVEL = 6
+# Quality 11, brotli's default, is meant for static files and is far too
+# slow per request
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+
+class _Gzip:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _Zstd:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+# Content-Encoding -> compressor class, most preferred first
+ENCODINGS = {}
+if zstandard is not None:
+    ENCODINGS['zstd'] = _Zstd
+if brotli is not None:
+    ENCODINGS['br'] = _Brotli
+ENCODINGS['gzip'] = _Gzip
+
+
+def _weights(accept_encoding):
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, *params = item.split(';')
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+    return weights
+
+
+def choose(accept_encoding):
+    """The encoding to answer an Accept-Encoding header with, or None"""
+    if not accept_encoding:
+        return None
+    weights = _weights(accept_encoding)
+    best, best_weight = None, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(data, encoding):
+    """Compresses a whole body"""
+    compressor = ENCODINGS[encoding]()
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_stream(chunks, encoding):
+    """Compresses an iterable of body chunks, one flushed block per chunk"""
+    compressor = ENCODINGS[encoding]()
+    for chunk in chunks:
+        if chunk:
+            yield compressor.compress(chunk) + compressor.flush()
+    yield compressor.finish()
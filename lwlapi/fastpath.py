@@ -0,0 +1,52 @@
+"""Read-only fast path for flat ModelSerializers
+
+DRF builds a model instance and walks every serializer field for each
+row. For serializers whose fields are all plain columns (foreign keys
+rendered as their primary key), the same output can be built straight
+from values_list() tuples, which is several times faster on big lists.
+
+A lwlapi.fieldsets Selection narrows the columns read; one that expands
+a relation goes through the serializer instead.
+"""
+from lwlapi.fieldsets import output_fields
+
+
+def _columns(serializer_class, fields=None):
+    meta = serializer_class.Meta
+    columns = []
+    for name in fields or meta.fields:
+        field = meta.model._meta.get_field(name)
+        if field.many_to_many or field.one_to_many:
+            return None
+        if field.is_relation and getattr(meta, 'depth', 0):
+            return None
+        columns.append(field.attname)
+    return columns
+
+
+def supports_fast_path(serializer_class, selection=None):
+    """True when serialize_values gives the same output as the serializer"""
+    return (not getattr(serializer_class, '_declared_fields', None)
+            and not (selection is not None and selection.expand)
+            and _columns(serializer_class) is not None)
+
+
+def iter_values(queryset, serializer_class, chunk_size=None, selection=None):
+    """Yields the serializer's output dict for every row of the queryset"""
+    fields = output_fields(serializer_class, selection)
+    rows = queryset.values_list(*_columns(serializer_class, fields))
+    if chunk_size:
+        rows = rows.iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield dict(zip(fields, row))
+
+
+def serialize_values(queryset, serializer_class, selection=None):
+    """Returns what serializer_class(queryset, many=True).data would
+
+    Falls back to the serializer itself when it has declared fields,
+    nests relations or expands one.
+    """
+    if not supports_fast_path(serializer_class, selection):
+        return serializer_class(queryset, many=True, selection=selection).data
+    return list(iter_values(queryset, serializer_class, selection=selection))
@@ -0,0 +1,176 @@
+"""Sparse fieldsets and expansion: the ?fields= and ?expand= query
+parameters of the read endpoints
+
+    /storys?fields=id,name
+    /storys?expand=uid&fields=id,name,uid.name
+    /individualstorys?fields=id,story.id,story.name
+
+`fields` keeps only the listed output fields, in the serializer's own
+order. A dotted name picks fields inside a nested object: the related
+rows of the join tables, or a foreign key named in `expand`. Expanding
+replaces the key with the related object (the owning user of stories,
+individuals and groups), loaded for a whole list in one extra query.
+
+narrow() makes the query match the output: unselected columns are left
+out with .only(), and nested objects nobody asked for are not joined.
+"""
+import functools
+
+from django.db.models import Prefetch
+from rest_framework.serializers import BaseSerializer
+
+
+class Selection:
+    """The parsed ?fields= and ?expand= of one request
+
+    fields maps every kept output field to None, or for a nested object
+    to the same kind of mapping of the fields kept inside it; it is None
+    when every field is kept. expand is the set of foreign keys to embed.
+    """
+    __slots__ = ('fields', 'expand')
+
+    def __init__(self, fields=None, expand=frozenset()):
+        self.fields = fields
+        self.expand = expand
+
+
+def _names(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+@functools.lru_cache(maxsize=None)
+def nested_names(serializer_class):
+    """Maps each output field of a serializer to the names of the fields
+    nested inside it, or to None for a flat field"""
+    names = {}
+    for name, field in serializer_class().fields.items():
+        field = getattr(field, 'child', field)
+        names[name] = tuple(field.fields) if isinstance(field, BaseSerializer) else None
+    return names
+
+
+def _expandable(serializer_class):
+    return getattr(serializer_class.Meta, 'expandable', {})
+
+
+def parse_selection(params, serializer_class):
+    """Reads ?fields= and ?expand= for a serializer with FieldsMixin
+
+    Returns:
+        Selection -- or None when the request has neither parameter
+
+    Raises:
+        ValueError -- with a message for the client, for an unknown field
+        or a relation that cannot be expanded
+    """
+    if 'fields' not in params and 'expand' not in params:
+        return None
+    names = nested_names(serializer_class)
+    expandable = _expandable(serializer_class)
+
+    expand = frozenset(_names(params.get('expand', '')))
+    for name in expand:
+        if name not in expandable:
+            if not expandable:
+                raise ValueError('Nothing can be expanded here.')
+            raise ValueError(f'expand must be one of {", ".join(expandable)}.')
+    if 'fields' not in params:
+        return Selection(None, expand)
+
+    fields = {}
+    for path in _names(params['fields']):
+        name, _, inner = path.partition('.')
+        if name not in names:
+            raise ValueError(f'Unknown field {name}.')
+        if not inner:
+            fields[name] = None
+            continue
+        inner_names = expandable[name].Meta.fields if name in expand else names[name]
+        if inner_names is None:
+            if name in expandable:
+                raise ValueError(f'{path} needs expand={name}.')
+            raise ValueError(f'{name} has no fields of its own.')
+        if inner not in inner_names:
+            raise ValueError(f'Unknown field {path}.')
+        if name not in fields:
+            fields[name] = {inner: None}
+        elif fields[name] is not None:
+            fields[name][inner] = None
+    if not fields:
+        raise ValueError('fields must name at least one field.')
+    return Selection(fields, expand)
+
+
+def output_fields(serializer_class, selection):
+    """The top-level fields a flat serializer renders for a Selection"""
+    fields = serializer_class.Meta.fields
+    if selection is None or selection.fields is None:
+        return tuple(fields)
+    return tuple(name for name in fields if name in selection.fields)
+
+
+def narrow(queryset, serializer_class, selection, ordering=None):
+    """Loads only what a Selection renders
+
+    ordering lists the order_by fields of a paginated list, which stay
+    loaded because the page cursor is read from them.
+
+    Returns:
+        QuerySet -- with the selected columns in .only(), select_related()
+        for the nested objects kept and the expanded relations prefetched
+    """
+    if selection is None:
+        return queryset
+    names = nested_names(serializer_class)
+    expandable = _expandable(serializer_class)
+    kept = selection.fields if selection.fields is not None else dict.fromkeys(names)
+
+    columns = [field.lstrip('-') for field in ordering or ()]
+    related = []
+    for name, inner in kept.items():
+        if name in selection.expand:
+            target = expandable[name]
+            columns.append(name)
+            queryset = queryset.prefetch_related(Prefetch(
+                name, queryset=target.Meta.model.objects.only(*(inner or target.Meta.fields))))
+        elif names[name] is not None:
+            related.append(name)
+            columns += [f'{name}__{field}' for field in inner or names[name]]
+        else:
+            columns.append(name)
+    queryset = queryset.select_related(None)
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(*columns)
+
+
+def _prune(fields, kept):
+    for name in list(fields):
+        if name not in kept:
+            del fields[name]
+        elif kept[name] is not None:
+            nested = fields[name]
+            _prune(getattr(nested, 'child', nested).fields, kept[name])
+
+
+class FieldsMixin:
+    """Serializer mixin that renders a Selection
+
+    Takes it as the `selection` keyword argument. Meta.expandable maps
+    the foreign keys ?expand= can embed to the serializer of the related
+    model.
+    """
+
+    def __init__(self, *args, selection=None, **kwargs):
+        self.selection = selection
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.selection is None:
+            return fields
+        for name in self.selection.expand:
+            fields[name] = self.Meta.expandable[name](read_only=True)
+        if self.selection.fields is not None:
+            _prune(fields, self.selection.fields)
+        return fields
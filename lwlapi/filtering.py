@@ -0,0 +1,85 @@
+"""Filtering and ordering query parameters of the story, individual and
+group lists
+
+    ?uid=3&type=white&name_prefix=Bir&min_id=100&max_id=200&ordering=-name
+
+Every accepted combination is served by an index: the primary key, the
+uid foreign key, or the composite (uid, type) and (uid, name) indexes on
+each model. Orderings other than by id need `uid`, because without it
+they would sort the whole table, so they are rejected instead.
+
+`name_prefix` is case-sensitive: it runs as a range on `name`, which
+can use the (uid, name) index on every backend, where SQLite's
+case-insensitive LIKE cannot.
+"""
+# Ordering parameter -> (order_by fields, needs uid)
+ORDERINGS = {
+    'id': (('id',), False),
+    '-id': (('-id',), False),
+    'name': (('name', 'id'), True),
+    '-name': (('-name', '-id'), True),
+    'type': (('type', 'id'), True),
+    '-type': (('-type', '-id'), True),
+}
+PARAMS = ('uid', 'type', 'name_prefix', 'min_id', 'max_id', 'ordering')
+# Sorts after every other character, in UTF-8 byte order and in Python
+LAST_CHARACTER = chr(0x10FFFF)
+
+
+def integer_param(params, name):
+    """Reads an integer query parameter
+
+    Returns:
+        int -- or None when the parameter is absent
+
+    Raises:
+        ValueError -- with a message for the client, when it is not an integer
+    """
+    value = params.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer.') from None
+
+
+def filter_owned(queryset, params):
+    """Applies the filtering and ordering query parameters to a list
+
+    Arguments:
+        queryset -- all rows of an owned model (with a `uid` foreign key)
+        params -- the request's query parameters
+
+    Returns:
+        tuple -- (filtered queryset, order_by fields or None when the
+        request keeps the default id order)
+
+    Raises:
+        ValueError -- with a message for the client, for a malformed value
+        or an ordering no index can serve
+    """
+    uid = integer_param(params, 'uid')
+    if uid is not None:
+        queryset = queryset.filter(uid=uid)
+    if 'type' in params:
+        queryset = queryset.filter(type=params['type'])
+    prefix = params.get('name_prefix')
+    if prefix:
+        queryset = queryset.filter(name__gte=prefix, name__lt=prefix + LAST_CHARACTER)
+
+    min_id, max_id = integer_param(params, 'min_id'), integer_param(params, 'max_id')
+    if min_id is not None:
+        queryset = queryset.filter(id__gte=min_id)
+    if max_id is not None:
+        queryset = queryset.filter(id__lte=max_id)
+
+    ordering = params.get('ordering')
+    if ordering is None:
+        return queryset, None
+    if ordering not in ORDERINGS:
+        raise ValueError(f'ordering must be one of {", ".join(ORDERINGS)}.')
+    fields, needs_uid = ORDERINGS[ordering]
+    if needs_uid and uid is None:
+        raise ValueError(f'ordering={ordering} needs uid.')
+    return queryset.order_by(*fields), fields
@@ -0,0 +1,172 @@
+"""Per-request database instrumentation
+
+Every database connection gets record_queries as an execute wrapper
+(installed on connection_created, see apps.py). While a request is being
+measured, it adds each statement's count and duration to that request's
+QueryStats, held in a context variable so it follows the request into the
+threads sync_to_async runs views on. Outside measure() it only calls
+through, unless the slow query log is on.
+
+Statements slower than LWL_SLOW_QUERY_MS are written to the
+'lwlapi.slow_queries' logger as one JSON object per line: the SQL, its
+parameters, the duration, the view and action that ran it, and the
+database's plan for it. settings.LOGGING sends them to the rotating file
+LWL_SLOW_QUERY_LOG, which `manage.py slow_queries` summarizes.
+"""
+import contextlib
+import contextvars
+import json
+import logging
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import DatabaseError
+
+slow_query_logger = logging.getLogger('lwlapi.slow_queries')
+
+_stats = contextvars.ContextVar('lwl_query_stats', default=None)
+
+# Statements EXPLAIN accepts without running them
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+
+
+class QueryStats:
+    """Number of statements and seconds spent in the database
+
+    `request` is the request being measured, if any.
+    """
+    __slots__ = ('queries', 'duration', 'request')
+
+    def __init__(self, request=None):
+        self.queries = 0
+        self.duration = 0.0
+        self.request = request
+
+
+def record_queries(execute, sql, params, many, context):
+    stats = _stats.get()
+    threshold = settings.LWL_SLOW_QUERY_MS
+    if stats is None and not threshold:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        result = execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        if stats is not None:
+            stats.queries += 1
+            stats.duration += duration
+    if threshold and duration * 1000 >= threshold:
+        log_slow_query(context['connection'], sql, None if many else params, duration, stats)
+    return result
+
+
+def install(sender, connection, **kwargs):
+    """connection_created receiver that adds record_queries once"""
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_queries)
+
+
+@contextlib.contextmanager
+def measure(request=None):
+    """Collects the QueryStats of the statements run inside the block"""
+    stats = QueryStats(request)
+    token = _stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _stats.reset(token)
+
+
+def explain(connection, sql, params):
+    """The database's plan for a statement, as a list of lines
+
+    Runs on a cursor of the backend itself, so neither record_queries nor
+    the result set of the cursor that ran the statement is involved. On
+    PostgreSQL a savepoint keeps a failing EXPLAIN from aborting the
+    surrounding transaction.
+
+    Returns:
+        list -- plan lines, or None for statements that cannot be explained
+    """
+    if not sql.lstrip()[:6].upper().startswith(EXPLAINABLE):
+        return None
+    if connection.vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    elif connection.vendor == 'postgresql':
+        prefix = 'EXPLAIN '
+    else:
+        return None
+    savepoint = connection.vendor == 'postgresql' and connection.in_atomic_block
+    cursor = connection.create_cursor()
+    try:
+        if savepoint:
+            cursor.execute('SAVEPOINT lwl_explain')
+        try:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+        except DatabaseError:
+            if savepoint:
+                cursor.execute('ROLLBACK TO SAVEPOINT lwl_explain')
+            raise
+        finally:
+            if savepoint:
+                cursor.execute('RELEASE SAVEPOINT lwl_explain')
+    finally:
+        cursor.close()
+    if connection.vendor == 'sqlite':
+        # (id, parent, notused, detail): indent each step under its parent
+        depth = {0: -1}
+        lines = []
+        for step, parent, _, detail in rows:
+            depth[step] = depth.get(parent, -1) + 1
+            lines.append('  ' * depth[step] + detail)
+        return lines
+    return [row[0] for row in rows]
+
+
+def log_slow_query(connection, sql, params, duration, stats=None):
+    """Writes one statement to the slow query log
+
+    params is None for executemany() batches, which are logged without
+    their parameters and plan.
+    """
+    request = stats.request if stats is not None else None
+    entry = {
+        'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+        'duration_ms': round(duration * 1000, 3),
+        'database': connection.alias,
+        'view': view_label(request) if request is not None else None,
+        'method': request.method if request is not None else None,
+        'path': request.path if request is not None else None,
+        'sql': sql,
+        'params': params,
+        'plan': None,
+    }
+    if params is not None or '%s' not in sql:
+        try:
+            entry['plan'] = explain(connection, sql, params)
+        except DatabaseError as error:
+            entry['plan_error'] = str(error)
+    slow_query_logger.warning(json.dumps(entry, default=str))
+
+
+def view_label(request):
+    """Names the view that served a request, e.g. 'StoryView.list'
+
+    Function views are named after the function. Returns None when the
+    request did not resolve to a view.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    view = getattr(match.func, 'cls', None)
+    if view is None:
+        return match.view_name or match.func.__name__
+    actions = getattr(match.func, 'actions', None)
+    if not actions:
+        return view.__name__
+    method = request.method.lower()
+    action = actions.get('get' if method == 'head' else method)
+    return f'{view.__name__}.{action}' if action else view.__name__
@@ -0,0 +1,66 @@
+from django.db import connections, router
+
+BATCH_SIZE = 500
+
+
+def _as_id(value):
+    """An id from a request body: an int or a string of one, nothing else
+    (int() alone would turn 1.9 or True into a valid-looking id)"""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f'{value!r} is not an integer id.')
+    return int(value)
+
+
+def _insert(link_model, owner_field, owner, other_field, ids):
+    """INSERTs the links that do not exist yet
+
+    ON CONFLICT DO NOTHING ... RETURNING (SQLite 3.35+, PostgreSQL) reports
+    only the rows this statement inserted, so a link a concurrent request
+    inserted first is not counted as added here.
+
+    Returns:
+        set -- the ids of `other_field` that were linked by this call
+    """
+    connection = connections[router.db_for_write(link_model)]
+    quote = connection.ops.quote_name
+    table = quote(link_model._meta.db_table)
+    owner_column = quote(link_model._meta.get_field(owner_field).column)
+    other_column = quote(link_model._meta.get_field(other_field).column)
+    inserted = set()
+    with connection.cursor() as cursor:
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = ids[start:start + BATCH_SIZE]
+            cursor.execute(
+                f"INSERT INTO {table} ({owner_column}, {other_column}) "
+                f"VALUES {', '.join(['(%s, %s)'] * len(batch))} "
+                f"ON CONFLICT DO NOTHING RETURNING {other_column}",
+                [value for pk in batch for value in (owner.pk, pk)])
+            inserted.update(row[0] for row in cursor.fetchall())
+    return inserted
+
+
+def link_to(link_model, owner_field, owner, other_field, requested_ids):
+    """Links `owner` to every requested row in a single batched INSERT
+
+    `owner_field` and `other_field` name the two foreign keys on
+    link_model. Must be called inside a transaction.
+
+    Returns:
+        tuple -- (added ids, already linked ids, ids that do not exist),
+        each in the order they were requested
+
+    Raises:
+        ValueError -- when a requested id is not an integer
+    """
+    requested_ids = list(dict.fromkeys(_as_id(pk) for pk in requested_ids))
+    other_model = link_model._meta.get_field(other_field).related_model
+
+    found_ids = set(other_model.objects.filter(
+        id__in=requested_ids).values_list('id', flat=True))
+    inserted = _insert(link_model, owner_field, owner, other_field,
+                       [pk for pk in requested_ids if pk in found_ids])
+
+    added = [pk for pk in requested_ids if pk in inserted]
+    existing = [pk for pk in requested_ids if pk in found_ids and pk not in inserted]
+    missing = [pk for pk in requested_ids if pk not in found_ids]
+    return added, existing, missing
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from lwlapi import search
+
+
+class Command(BaseCommand):
+    help = ('Creates the full-text search index of stories, individuals and '
+            'groups if it is missing and rebuilds it from the tables.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        counts = search.rebuild(connections[options['database']])
+        for name, count in counts.items():
+            self.stdout.write(f'{name}: {count} rows')
+        self.stdout.write(self.style.SUCCESS(
+            f'Search index rebuilt in {time.perf_counter() - start:.1f} s'))
@@ -0,0 +1,93 @@
+import json
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# IN (%s, %s, ...) lists of any length count as one statement
+PLACEHOLDERS = re.compile(r'%s(?:\s*,\s*%s)+')
+SORTS = ('total', 'max', 'mean', 'count')
+
+
+def normalize(sql):
+    return ' '.join(PLACEHOLDERS.sub('%s, ...', sql).split())
+
+
+def read_log(path):
+    """Entries of a slow query log and of its rotated backups, oldest first"""
+    path = Path(path)
+    backups = sorted((file for file in path.parent.glob(path.name + '.*')
+                      if file.suffix[1:].isdigit()),
+                     key=lambda file: int(file.suffix[1:]), reverse=True)
+    for file in [*backups, path]:
+        with open(file) as lines:
+            for line in lines:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def summarize(entries):
+    """Groups log entries by normalized statement
+
+    Returns:
+        list -- a dict per statement with its count, total, max and mean
+        duration in ms, the views that ran it and its slowest occurrence
+    """
+    statements = {}
+    for entry in entries:
+        key = normalize(entry['sql'])
+        statement = statements.get(key)
+        if statement is None:
+            statement = statements[key] = {
+                'sql': key, 'count': 0, 'total': 0.0, 'max': 0.0, 'views': {}, 'slowest': entry}
+        duration = entry['duration_ms']
+        statement['count'] += 1
+        statement['total'] += duration
+        if duration >= statement['max']:
+            statement['max'] = duration
+            statement['slowest'] = entry
+        view = entry.get('view') or '-'
+        statement['views'][view] = statement['views'].get(view, 0) + 1
+    for statement in statements.values():
+        statement['mean'] = statement['total'] / statement['count']
+    return list(statements.values())
+
+
+class Command(BaseCommand):
+    help = ('Summarizes the slow query log: the statements that took the most '
+            'time, with the views that ran them and the plan of their slowest run.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=settings.LWL_SLOW_QUERY_LOG,
+                            help='Log file, LWL_SLOW_QUERY_LOG by default; its rotated '
+                                 'backups are read too.')
+        parser.add_argument('--sort', choices=SORTS, default='total')
+        parser.add_argument('--limit', type=int, default=10)
+
+    def handle(self, *args, **options):
+        if not options['log']:
+            raise CommandError('Set LWL_SLOW_QUERY_LOG or pass --log.')
+        path = Path(options['log'])
+        if not path.exists():
+            raise CommandError(f'No slow query log at {path}')
+        statements = summarize(read_log(path))
+        statements.sort(key=lambda statement: statement[options['sort']], reverse=True)
+        self.stdout.write(f'{len(statements)} slow statements in {path}')
+        for rank, statement in enumerate(statements[:options['limit']], 1):
+            views = ', '.join(f'{view} ({count})' for view, count in
+                              sorted(statement['views'].items(), key=lambda item: -item[1]))
+            slowest = statement['slowest']
+            self.stdout.write('')
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'#{rank}  {statement["count"]} x, total {statement["total"]:.1f} ms, '
+                f'mean {statement["mean"]:.1f} ms, max {statement["max"]:.1f} ms'))
+            self.stdout.write(f'  views: {views}')
+            self.stdout.write(f'  {statement["sql"]}')
+            self.stdout.write(f'  slowest: {slowest["time"]} params {slowest["params"]}')
+            for line in slowest.get('plan') or []:
+                self.stdout.write(f'    {line}')
+            if slowest.get('plan_error'):
+                self.stdout.write(f'    (no plan: {slowest["plan_error"]})')
@@ -0,0 +1,250 @@
+"""Request metrics per view and action, in the Prometheus text format
+
+metrics_middleware calls record() once per request. Each thread counts
+into its own shard, so recording takes no lock; collect() adds the shards
+up when /metrics is scraped. The shards of threads that have exited are
+folded into one retired total, so thread-per-connection servers do not
+grow the list.
+
+With several worker processes, set LWL_METRICS_DIR to a directory they
+share. Every process then writes its totals to <pid>.json there every
+FLUSH_SECONDS (and at exit), and a scrape of any worker adds up all
+files. Files of exited workers are kept so the counters never go back;
+empty the directory when deploying.
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+FLUSH_SECONDS = 5
+
+
+class _Shard:
+    """One thread's counts
+
+    requests maps (view, method, status) to a count; latency and sizes
+    map a view to its histogram: a count per bucket, one for +Inf, and
+    the sum of all values.
+    """
+    __slots__ = ('requests', 'latency', 'sizes')
+
+    def __init__(self):
+        self.requests = {}
+        self.latency = {}
+        self.sizes = {}
+
+
+_local = threading.local()
+# (thread, shard) of every thread that has recorded and not been retired
+_shards = []
+_retired = _Shard()
+_shards_lock = threading.Lock()
+_flusher = None
+
+
+def _retire_exited():
+    """Folds the shards of exited threads into _retired; needs _shards_lock"""
+    live = []
+    for thread, shard in _shards:
+        if thread.is_alive():
+            live.append((thread, shard))
+        else:
+            _merge(_retired, shard)
+    _shards[:] = live
+
+
+def _shard():
+    try:
+        return _local.shard
+    except AttributeError:
+        shard = _local.shard = _Shard()
+        with _shards_lock:
+            _retire_exited()
+            _shards.append((threading.current_thread(), shard))
+        return shard
+
+
+def _observe(histograms, view, buckets, value):
+    counts = histograms.get(view)
+    if counts is None:
+        counts = histograms[view] = [0] * (len(buckets) + 2)
+    counts[bisect_left(buckets, value)] += 1
+    counts[-1] += value
+
+
+def record(view, method, status, duration, size=None):
+    """Counts one request; size is None when it is not known yet"""
+    shard = _shard()
+    key = (view, method, status)
+    shard.requests[key] = shard.requests.get(key, 0) + 1
+    _observe(shard.latency, view, LATENCY_BUCKETS, duration)
+    if size is not None:
+        _observe(shard.sizes, view, SIZE_BUCKETS, size)
+    if _flusher is None and settings.LWL_METRICS_DIR:
+        _start_flusher()
+
+
+def record_size(view, size):
+    """Adds the size of a streamed response once it has been sent"""
+    _observe(_shard().sizes, view, SIZE_BUCKETS, size)
+
+
+def _add(histograms, view, counts):
+    total = histograms.get(view)
+    if total is None:
+        histograms[view] = list(counts)
+    else:
+        for index, count in enumerate(counts):
+            total[index] += count
+
+
+def _merge(totals, shard):
+    for key, count in list(shard.requests.items()):
+        totals.requests[key] = totals.requests.get(key, 0) + count
+    for view, counts in list(shard.latency.items()):
+        _add(totals.latency, view, counts)
+    for view, counts in list(shard.sizes.items()):
+        _add(totals.sizes, view, counts)
+
+
+def snapshot():
+    """Adds up the shards of this process"""
+    totals = _Shard()
+    with _shards_lock:
+        _retire_exited()
+        _merge(totals, _retired)
+        shards = [shard for _, shard in _shards]
+    for shard in shards:
+        _merge(totals, shard)
+    return totals
+
+
+def reset():
+    """Forgets everything this process counted (for tests)"""
+    with _shards_lock:
+        _retired.__init__()
+        for _, shard in _shards:
+            shard.__init__()
+
+
+def flush():
+    """Writes this process's totals to LWL_METRICS_DIR/<pid>.json"""
+    directory = settings.LWL_METRICS_DIR
+    if not directory:
+        return
+    totals = snapshot()
+    data = {
+        'requests': [[*key, count] for key, count in totals.requests.items()],
+        'latency': totals.latency,
+        'sizes': totals.sizes,
+    }
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(descriptor, 'w') as file:
+        json.dump(data, file)
+    os.replace(temporary, Path(directory) / f'{os.getpid()}.json')
+
+
+def _flush_forever():
+    while True:
+        time.sleep(FLUSH_SECONDS)
+        flush()
+
+
+def _start_flusher():
+    global _flusher
+    with _shards_lock:
+        if _flusher is not None:
+            return
+        _flusher = threading.Thread(target=_flush_forever, name='lwl-metrics', daemon=True)
+    _flusher.start()
+    atexit.register(flush)
+
+
+def _forget_parent():
+    """A forked worker starts with no counts and no flusher thread"""
+    global _flusher, _shards_lock
+    _flusher = None
+    _shards_lock = threading.Lock()
+    _shards.clear()
+    _retired.__init__()
+    _local.__dict__.clear()
+
+
+os.register_at_fork(after_in_child=_forget_parent)
+
+
+def collect():
+    """Totals of every process sharing LWL_METRICS_DIR, or of this one"""
+    directory = settings.LWL_METRICS_DIR
+    if not directory:
+        return snapshot()
+    flush()
+    totals = _Shard()
+    for path in Path(directory).glob('*.json'):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        for *key, count in data['requests']:
+            key = tuple(key)
+            totals.requests[key] = totals.requests.get(key, 0) + count
+        for view, counts in data['latency'].items():
+            _add(totals.latency, view, counts)
+        for view, counts in data['sizes'].items():
+            _add(totals.sizes, view, counts)
+    return totals
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _histogram(lines, name, help, buckets, histograms):
+    lines += [f'# HELP {name} {help}', f'# TYPE {name} histogram']
+    for view, counts in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip((*buckets, '+Inf'), counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(view=view, le=bound)} {cumulative}')
+        lines.append(f'{name}_sum{_labels(view=view)} {counts[-1]}')
+        lines.append(f'{name}_count{_labels(view=view)} {cumulative}')
+
+
+def exposition(totals):
+    """Renders collect() output in the Prometheus text exposition format"""
+    lines = [
+        '# HELP lwl_http_requests_total Requests served, by view, method and status.',
+        '# TYPE lwl_http_requests_total counter',
+    ]
+    errors = {}
+    for (view, method, status), count in sorted(totals.requests.items()):
+        lines.append(f'lwl_http_requests_total'
+                     f'{_labels(view=view, method=method, status=status)} {count}')
+        if status >= 500:
+            errors[view] = errors.get(view, 0) + count
+        else:
+            errors.setdefault(view, 0)
+    lines += [
+        '# HELP lwl_http_request_errors_total Requests answered with a 5xx status, by view.',
+        '# TYPE lwl_http_request_errors_total counter',
+    ]
+    lines += [f'lwl_http_request_errors_total{_labels(view=view)} {count}'
+              for view, count in sorted(errors.items())]
+    _histogram(lines, 'lwl_http_request_duration_seconds',
+               'Time until the response was returned, by view.',
+               LATENCY_BUCKETS, totals.latency)
+    _histogram(lines, 'lwl_http_response_size_bytes', 'Response body size, by view.',
+               SIZE_BUCKETS, totals.sizes)
+    return '\n'.join(lines) + '\n'
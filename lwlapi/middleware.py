@@ -0,0 +1,194 @@
+import logging
+import time
+from asyncio import iscoroutinefunction
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import sync_and_async_middleware
+from lwlapi import compression, metrics
+from lwlapi.instrumentation import measure, view_label
+from lwlapi.routers import use_replica
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PRIMARY_COOKIE = 'lwl_primary_until'
+PRIMARY_HEADER = 'X-Primary-Until'
+
+
+def _primary_until(request):
+    value = (request.COOKIES.get(PRIMARY_COOKIE)
+             or request.headers.get(PRIMARY_HEADER))
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _start(request):
+    return use_replica.set(request.method in SAFE_METHODS
+                           and _primary_until(request) < time.time())
+
+
+def _finish(request, response, token):
+    use_replica.reset(token)
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        window = settings.LWL_READ_YOUR_WRITES_SECONDS
+        until = f'{time.time() + window:.3f}'
+        response.set_cookie(PRIMARY_COOKIE, until, max_age=window,
+                            httponly=True, samesite='Lax')
+        response[PRIMARY_HEADER] = until
+    return response
+
+
+@sync_and_async_middleware
+def replica_middleware(get_response):
+    """Lets safe requests read from replicas, except right after a write
+
+    A successful write answers with a cookie and an X-Primary-Until
+    header holding the time until which that client's reads stay on the
+    primary; clients without cookies send the header back instead.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = _start(request)
+            return _finish(request, await get_response(request), token)
+    else:
+        def middleware(request):
+            token = _start(request)
+            return _finish(request, get_response(request), token)
+    return middleware
+
+
+def _report_queries(request, response, stats):
+    response.query_stats = stats
+    response['X-DB-Queries'] = str(stats.queries)
+    response['Server-Timing'] = (
+        f'db;dur={stats.duration * 1000:.2f};desc="{stats.queries} queries"')
+    logger.debug('%s %s %s: %d queries in %.2f ms', view_label(request), request.method,
+                 request.path, stats.queries, stats.duration * 1000)
+    return response
+
+
+@sync_and_async_middleware
+def query_stats_middleware(get_response):
+    """Reports the number of queries and the database time of each request
+
+    When LWL_QUERY_STATS is on, every response carries X-DB-Queries and a
+    Server-Timing 'db' entry, keeps the numbers in `response.query_stats`,
+    and is logged at DEBUG level under the view and action that served it.
+    Queries a streamed body runs after the response started are not
+    included.
+
+    Requests are also measured while the slow query log is on, so that
+    slow statements are logged with the view that ran them.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not (settings.LWL_QUERY_STATS or settings.LWL_SLOW_QUERY_MS):
+                return await get_response(request)
+            with measure(request) as stats:
+                response = await get_response(request)
+            if not settings.LWL_QUERY_STATS:
+                return response
+            return _report_queries(request, response, stats)
+    else:
+        def middleware(request):
+            if not (settings.LWL_QUERY_STATS or settings.LWL_SLOW_QUERY_MS):
+                return get_response(request)
+            with measure(request) as stats:
+                response = get_response(request)
+            if not settings.LWL_QUERY_STATS:
+                return response
+            return _report_queries(request, response, stats)
+    return middleware
+
+
+def _counted(chunks, view):
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+        yield chunk
+    metrics.record_size(view, size)
+
+
+def _record_metrics(request, response, start):
+    duration = time.perf_counter() - start
+    view = view_label(request) or 'unresolved'
+    if response.streaming:
+        response.streaming_content = _counted(response.streaming_content, view)
+        size = None
+    else:
+        size = len(response.content)
+    metrics.record(view, request.method, response.status_code, duration, size)
+    return response
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """Records latency, status and response size per view and action
+
+    Requests that resolve to no view are counted as 'unresolved', so
+    unknown paths cannot add labels. Served on /metrics (lwlapi.metrics);
+    LWL_METRICS=0 turns recording off.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not settings.LWL_METRICS:
+                return await get_response(request)
+            start = time.perf_counter()
+            return _record_metrics(request, await get_response(request), start)
+    else:
+        def middleware(request):
+            if not settings.LWL_METRICS:
+                return get_response(request)
+            start = time.perf_counter()
+            return _record_metrics(request, get_response(request), start)
+    return middleware
+
+
+def _compress(request, response):
+    if (not settings.LWL_COMPRESSION or response.has_header('Content-Encoding')
+            or (not response.streaming
+                and len(response.content) < settings.LWL_COMPRESS_MIN_BYTES)):
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    encoding = compression.choose(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if encoding is None:
+        return response
+
+    if response.streaming:
+        response.streaming_content = compression.compress_stream(
+            response.streaming_content, encoding)
+        if response.has_header('Content-Length'):
+            del response['Content-Length']
+    else:
+        body = compression.compress(response.content, encoding)
+        if len(body) >= len(response.content):
+            return response
+        response.content = body
+        response['Content-Length'] = str(len(body))
+
+    # The same version validates every encoding of the body, so the ETag
+    # stays and only becomes weak (caching.matches compares weakly)
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    response['Content-Encoding'] = encoding
+    return response
+
+
+@sync_and_async_middleware
+def compression_middleware(get_response):
+    """Compresses responses for clients that send Accept-Encoding
+
+    See lwlapi/compression.py for the encodings; streamed responses are
+    compressed as they are sent. LWL_COMPRESSION=0 turns it off.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            return _compress(request, await get_response(request))
+    else:
+        def middleware(request):
+            return _compress(request, get_response(request))
+    return middleware
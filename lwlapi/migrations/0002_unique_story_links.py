@@ -0,0 +1,41 @@
+# Generated by Django 4.1.3 on 2026-10-18 14:17
+
+from django.db import migrations, models
+
+
+def remove_duplicate_links(apps, schema_editor):
+    """Keeps the oldest row of every duplicated (owner, story) pair so the
+    unique constraints below can be created"""
+    for model_name, owner in (('IndividualStory', 'individual'), ('GroupStory', 'group')):
+        model = apps.get_model('lwlapi', model_name)
+        keep = model.objects.values(owner, 'story').annotate(
+            keep_id=models.Min('id')).values('keep_id')
+        model.objects.exclude(id__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lwlapi', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_links,
+                             migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='groupstory',
+            constraint=models.UniqueConstraint(fields=('group', 'story'), name='unique_group_story'),
+        ),
+        migrations.AddConstraint(
+            model_name='groupstory',
+            constraint=models.UniqueConstraint(fields=('story', 'group'), name='unique_story_group'),
+        ),
+        migrations.AddConstraint(
+            model_name='individualstory',
+            constraint=models.UniqueConstraint(fields=('individual', 'story'), name='unique_individual_story'),
+        ),
+        migrations.AddConstraint(
+            model_name='individualstory',
+            constraint=models.UniqueConstraint(fields=('story', 'individual'), name='unique_story_individual'),
+        ),
+    ]
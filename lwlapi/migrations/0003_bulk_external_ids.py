@@ -0,0 +1,40 @@
+# Generated by Django 4.1.3 on 2026-10-18 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lwlapi', '0002_unique_story_links'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='individual',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='story',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='group',
+            constraint=models.UniqueConstraint(fields=('uid', 'external_id'), name='unique_group_external_id'),
+        ),
+        migrations.AddConstraint(
+            model_name='individual',
+            constraint=models.UniqueConstraint(fields=('uid', 'external_id'), name='unique_individual_external_id'),
+        ),
+        migrations.AddConstraint(
+            model_name='story',
+            constraint=models.UniqueConstraint(fields=('uid', 'external_id'), name='unique_story_external_id'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.1.3 on 2026-10-18 14:39
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lwlapi', '0003_bulk_external_ids'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='group',
+            options={'ordering': ['id']},
+        ),
+        migrations.AlterModelOptions(
+            name='groupstory',
+            options={'ordering': ['id']},
+        ),
+        migrations.AlterModelOptions(
+            name='individual',
+            options={'ordering': ['id']},
+        ),
+        migrations.AlterModelOptions(
+            name='individualstory',
+            options={'ordering': ['id']},
+        ),
+        migrations.AlterModelOptions(
+            name='story',
+            options={'ordering': ['id']},
+        ),
+        migrations.AlterModelOptions(
+            name='user',
+            options={'ordering': ['id']},
+        ),
+    ]
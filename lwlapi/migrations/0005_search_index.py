@@ -0,0 +1,76 @@
+from django.db import migrations
+
+# The SQL lwlapi.search installs, frozen as of this migration: later
+# changes to that module or to the models must not change what replaying
+# the migrations creates. `manage.py rebuild_search_index` brings an
+# existing database up to the current lwlapi.search.
+MODELS = ('Story', 'Individual', 'Group')
+
+
+def _tables(apps):
+    return [apps.get_model('lwlapi', name)._meta.db_table for name in MODELS]
+
+
+def _sqlite_install(cursor, table):
+    fts = f'{table}_fts'
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(name, description, uid_id, "
+        f"content='{table}', content_rowid='id', tokenize='porter unicode61')")
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, name, description, uid_id) "
+        f"VALUES (new.id, new.name, new.description, new.uid_id); END")
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, name, description, uid_id) "
+        f"VALUES ('delete', old.id, old.name, old.description, old.uid_id); END")
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, name, description, uid_id) "
+        f"VALUES ('delete', old.id, old.name, old.description, old.uid_id); "
+        f"INSERT INTO {fts}(rowid, name, description, uid_id) "
+        f"VALUES (new.id, new.name, new.description, new.uid_id); END")
+    # Index the rows that existed before the triggers
+    cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def _postgresql_install(cursor, table):
+    cursor.execute(
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search tsvector GENERATED ALWAYS AS ("
+        f"setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+        f"setweight(to_tsvector('english', coalesce(description, '')), 'B')) STORED")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {table}_search ON {table} USING gin (search)")
+
+
+def install(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        for table in _tables(apps):
+            if vendor == 'sqlite':
+                _sqlite_install(cursor, table)
+            elif vendor == 'postgresql':
+                _postgresql_install(cursor, table)
+
+
+def uninstall(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        for table in _tables(apps):
+            if vendor == 'sqlite':
+                for action in ('insert', 'delete', 'update'):
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{action}")
+                cursor.execute(f"DROP TABLE IF EXISTS {table}_fts")
+            elif vendor == 'postgresql':
+                cursor.execute(f"DROP INDEX IF EXISTS {table}_search")
+                cursor.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lwlapi', '0004_default_ordering'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
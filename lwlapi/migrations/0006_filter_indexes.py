@@ -0,0 +1,37 @@
+# Generated by Django 4.1.3 on 2026-10-18 14:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lwlapi', '0005_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['uid', 'type'], name='group_uid_type'),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['uid', 'name'], name='group_uid_name'),
+        ),
+        migrations.AddIndex(
+            model_name='individual',
+            index=models.Index(fields=['uid', 'type'], name='individual_uid_type'),
+        ),
+        migrations.AddIndex(
+            model_name='individual',
+            index=models.Index(fields=['uid', 'name'], name='individual_uid_name'),
+        ),
+        migrations.AddIndex(
+            model_name='story',
+            index=models.Index(fields=['uid', 'type'], name='story_uid_type'),
+        ),
+        migrations.AddIndex(
+            model_name='story',
+            index=models.Index(fields=['uid', 'name'], name='story_uid_name'),
+        ),
+    ]
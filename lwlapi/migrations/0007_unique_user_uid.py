@@ -0,0 +1,54 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+OWNED = ('Story', 'Individual', 'Group')
+
+
+def merge_duplicate_users(apps, schema_editor):
+    """Folds every set of users sharing a uid into the oldest of them
+
+    The oldest row keeps its id, which is the one check_user has always
+    returned, and takes the name and bio of the latest registration. Rows
+    owned by the newer duplicates move to it; an external_id that it
+    already uses is cleared on the moved row rather than dropped.
+    """
+    User = apps.get_model('lwlapi', 'User')
+    duplicated = (User.objects.values('uid').annotate(rows=Count('id'))
+                  .filter(rows__gt=1).values_list('uid', flat=True))
+    for uid in duplicated:
+        users = list(User.objects.filter(uid=uid).order_by('id'))
+        keep, others = users[0], [user.id for user in users[1:]]
+        for name in OWNED:
+            model = apps.get_model('lwlapi', name)
+            taken = set(model.objects.filter(uid=keep, external_id__isnull=False)
+                        .values_list('external_id', flat=True))
+            for row in model.objects.filter(uid_id__in=others).order_by('id'):
+                if row.external_id in taken:
+                    row.external_id = None
+                elif row.external_id is not None:
+                    taken.add(row.external_id)
+                row.uid = keep
+                row.save(update_fields=['uid', 'external_id'])
+        keep.name, keep.bio = users[-1].name, users[-1].bio
+        keep.save(update_fields=['name', 'bio'])
+        User.objects.filter(id__in=others).delete()
+    if schema_editor.connection.vendor == 'postgresql':
+        # The unique constraint below cannot be added while the foreign
+        # key checks of the moved rows are still deferred
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lwlapi', '0006_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_users, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='user',
+            name='uid',
+            field=models.CharField(max_length=50, unique=True),
+        ),
+    ]
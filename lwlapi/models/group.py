@@ -7,3 +7,17 @@ class Group(models.Model):
     uid = models.ForeignKey(User, on_delete=models.CASCADE)
     description = models.CharField(max_length=500)
     type = models.CharField(max_length=100)
+    # Client-supplied import key; POST /groups/bulk upserts on (uid, external_id)
+    external_id = models.CharField(max_length=100, null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        # Back the filters and orderings of lwlapi.filtering
+        indexes = [
+            models.Index(fields=['uid', 'type'], name='group_uid_type'),
+            models.Index(fields=['uid', 'name'], name='group_uid_name'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['uid', 'external_id'], name='unique_group_external_id'),
+        ]
@@ -8,3 +8,12 @@ class GroupStory(models.Model):
         Group, on_delete=models.CASCADE, related_name='group_storys')
     story = models.ForeignKey(
         Story, on_delete=models.CASCADE, related_name='group_related_storys')
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['group', 'story'], name='unique_group_story'),
+            models.UniqueConstraint(
+                fields=['story', 'group'], name='unique_story_group'),
+        ]
@@ -8,3 +8,12 @@ class IndividualStory(models.Model):
         Individual, on_delete=models.CASCADE, related_name='individual_storys')
     story = models.ForeignKey(
         Story, on_delete=models.CASCADE, related_name='individual_related_storys')
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['individual', 'story'], name='unique_individual_story'),
+            models.UniqueConstraint(
+                fields=['story', 'individual'], name='unique_story_individual'),
+        ]
@@ -8,3 +8,17 @@ class Story(models.Model):
         User, on_delete=models.CASCADE, related_name='stories')
     description = models.CharField(max_length=500)
     type = models.CharField(max_length=100)
+    # Client-supplied import key; POST /storys/bulk upserts on (uid, external_id)
+    external_id = models.CharField(max_length=100, null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        # Back the filters and orderings of lwlapi.filtering
+        indexes = [
+            models.Index(fields=['uid', 'type'], name='story_uid_type'),
+            models.Index(fields=['uid', 'name'], name='story_uid_name'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['uid', 'external_id'], name='unique_story_external_id'),
+        ]
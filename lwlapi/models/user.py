@@ -5,4 +5,7 @@ class User(models.Model):
 
     name = models.CharField(max_length=50)
     bio = models.CharField(max_length=250)
-    uid = models.CharField(max_length=50)
+    uid = models.CharField(max_length=50, unique=True)
+
+    class Meta:
+        ordering = ['id']
@@ -0,0 +1,21 @@
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """Opt-in keyset pagination ordered by primary key
+
+    Only kicks in when the client sends ?limit= or ?cursor=, so callers
+    that send neither keep getting the full, unwrapped list. Each page is
+    a `WHERE id > <last id> ORDER BY id LIMIT n` query, so deep pages cost
+    the same as the first one.
+    """
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'limit'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (self.page_size_query_param not in request.query_params
+                and self.cursor_query_param not in request.query_params):
+            return None
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,43 @@
+"""Faster parsers for DRF request bodies, the counterparts of
+lwlapi.renderers
+
+ORJSONParser reads UTF-8 JSON with orjson. Other charsets, and bodies
+orjson rejects, go through DRF's JSONParser, so what is accepted and the
+400 message for a malformed body stay the same.
+"""
+import io
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from lwlapi.renderers import MessagePackRenderer, ORJSONRenderer, msgpack, orjson
+
+UTF8 = ('utf-8', 'utf8')
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser that decodes with orjson"""
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower() not in UTF8:
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
+
+
+class MessagePackParser(BaseParser):
+    """Parses MessagePack request bodies"""
+    media_type = 'application/msgpack'
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError, msgpack.UnpackException) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
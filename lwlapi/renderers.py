@@ -0,0 +1,63 @@
+"""Faster renderers for DRF responses
+
+ORJSONRenderer writes the same bytes as DRF's JSONRenderer for every
+response this API sends, several times faster, by encoding with orjson.
+Whatever orjson cannot encode the same way (indented output, ASCII-only
+or non-compact settings, integers wider than 64 bits) goes through
+JSONRenderer itself. Without orjson installed it is JSONRenderer.
+
+MessagePackRenderer answers clients that send
+`Accept: application/msgpack` (or ?format=msgpack) when msgpack is
+installed; lwl/settings.py only lists it then.
+"""
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Types orjson and msgpack do not know (Decimal, lazy strings, querysets,
+# ...) become what DRF's JSONEncoder makes of them
+_encoder = JSONEncoder()
+
+if orjson is not None:
+    # Datetimes go through _encoder too, which writes UTC as 'Z' like DRF
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            body = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escaped like JSONRenderer does, to stay a strict JavaScript subset.
+        # Both start with 0xe2, which a single-byte search rules out fast.
+        if b'\xe2' in body:
+            body = body.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return body
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Renders responses as MessagePack"""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_encoder.default, use_bin_type=True)
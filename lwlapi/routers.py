@@ -0,0 +1,50 @@
+"""Database router that sends safe requests to read replicas
+
+Every alias in DATABASES other than 'default' is a replica. Reads go to a
+random replica only while replica_middleware has marked the current
+request as safe (GET/HEAD/OPTIONS from a client that has not written
+recently); everything else, including code running outside a request,
+uses the primary.
+"""
+import contextlib
+import contextvars
+import random
+
+from django.conf import settings
+
+PRIMARY = 'default'
+
+use_replica = contextvars.ContextVar('lwl_use_replica', default=False)
+
+
+def replicas():
+    return [alias for alias in settings.DATABASES if alias != PRIMARY]
+
+
+@contextlib.contextmanager
+def on_primary():
+    """Sends the reads inside the block to the primary"""
+    token = use_replica.set(False)
+    try:
+        yield
+    finally:
+        use_replica.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if use_replica.get():
+            aliases = replicas()
+            if aliases:
+                return random.choice(aliases)
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
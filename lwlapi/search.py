@@ -0,0 +1,177 @@
+"""Full-text search over the name and description of stories, individuals
+and groups
+
+SQLite keeps one FTS5 table per model (lwlapi_<model>_fts) as an external
+content index of the model's table, with `uid_id` indexed as a column so
+a search scoped to one user is a single index lookup. Triggers on the
+model table keep it in sync with every insert, update and delete,
+including bulk ones. PostgreSQL gets a generated, GIN-indexed tsvector
+column per table instead, which the database maintains by itself.
+
+Django re-creates an SQLite table, and drops its triggers, when a
+migration alters a column in a way ALTER TABLE cannot, so run
+`manage.py rebuild_search_index` after such migrations. It installs
+whatever is missing and rebuilds the index from the tables.
+"""
+import re
+
+from django.db import connections, router
+from lwlapi.models import Group, Individual, Story
+
+MODELS = {'story': Story, 'individual': Individual, 'group': Group}
+COLUMNS = ('name', 'description')
+MAX_LIMIT = 100
+# Matches in the name count for more than matches in the description
+NAME_WEIGHT = 10.0
+
+
+def terms(query):
+    """Splits a user query into the words to match, dropping syntax"""
+    return re.findall(r'\w+', query)
+
+
+def _fts(model):
+    return f'{model._meta.db_table}_fts'
+
+
+def _sqlite_install(cursor, model):
+    table, fts = model._meta.db_table, _fts(model)
+    columns = ', '.join(COLUMNS + ('uid_id',))
+    new = ', '.join(f'new.{column}' for column in COLUMNS + ('uid_id',))
+    old = ', '.join(f'old.{column}' for column in COLUMNS + ('uid_id',))
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columns}, "
+        f"content='{table}', content_rowid='id', tokenize='porter unicode61')")
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new}); END")
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old}); END")
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new}); END")
+
+
+def _postgresql_install(cursor, model):
+    table = model._meta.db_table
+    # Only run DDL when needed: ALTER TABLE and CREATE INDEX fail inside a
+    # transaction that has pending deferred constraint checks.
+    cursor.execute(
+        "SELECT 1 FROM information_schema.columns "
+        "WHERE table_name = %s AND column_name = 'search'", [table])
+    if cursor.fetchone() is None:
+        cursor.execute(
+            f"ALTER TABLE {table} ADD COLUMN search tsvector GENERATED ALWAYS AS ("
+            f"setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+            f"setweight(to_tsvector('english', coalesce(description, '')), 'B')) STORED")
+    cursor.execute("SELECT 1 FROM pg_indexes WHERE indexname = %s", [f'{table}_search'])
+    if cursor.fetchone() is None:
+        cursor.execute(f"CREATE INDEX {table}_search ON {table} USING gin (search)")
+
+
+def install(connection):
+    """Creates the search index of every model if it does not exist yet"""
+    with connection.cursor() as cursor:
+        for model in MODELS.values():
+            if connection.vendor == 'sqlite':
+                _sqlite_install(cursor, model)
+            elif connection.vendor == 'postgresql':
+                _postgresql_install(cursor, model)
+
+
+def uninstall(connection):
+    with connection.cursor() as cursor:
+        for model in MODELS.values():
+            table = model._meta.db_table
+            if connection.vendor == 'sqlite':
+                for action in ('insert', 'delete', 'update'):
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {_fts(model)}_{action}")
+                cursor.execute(f"DROP TABLE IF EXISTS {_fts(model)}")
+            elif connection.vendor == 'postgresql':
+                cursor.execute(f"DROP INDEX IF EXISTS {table}_search")
+                cursor.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search")
+
+
+def rebuild(connection):
+    """Installs what is missing and rebuilds every index from its table
+
+    Returns:
+        dict -- number of indexed rows per model
+    """
+    install(connection)
+    counts = {}
+    with connection.cursor() as cursor:
+        for name, model in MODELS.items():
+            table = model._meta.db_table
+            if connection.vendor == 'sqlite':
+                cursor.execute(f"INSERT INTO {_fts(model)}({_fts(model)}) VALUES ('rebuild')")
+                cursor.execute(f"INSERT INTO {_fts(model)}({_fts(model)}) VALUES ('optimize')")
+            elif connection.vendor == 'postgresql':
+                cursor.execute(f"REINDEX INDEX {table}_search")
+            cursor.execute(f"SELECT count(*) FROM {table}")
+            counts[name] = cursor.fetchone()[0]
+    return counts
+
+
+def _sqlite_match(model, words, uid, limit):
+    """Ids and bm25 scores (higher is better) of the best matches"""
+    # Quote every word so FTS5 treats it as text, and match the last one
+    # as a prefix for search-as-you-type.
+    quoted = ['"' + word.replace('"', '""') + '"' for word in words]
+    quoted[-1] += '*'
+    expression = '{%s} : (%s)' % (' '.join(COLUMNS), ' AND '.join(quoted))
+    if uid is not None:
+        expression = f'uid_id : "{uid}" AND {expression}'
+    fts = _fts(model)
+    return (
+        f"SELECT rowid, -bm25({fts}, {NAME_WEIGHT}, 1.0, 0.0) FROM {fts} "
+        f"WHERE {fts} MATCH %s ORDER BY bm25({fts}, {NAME_WEIGHT}, 1.0, 0.0) LIMIT %s",
+        [expression, limit])
+
+
+def _postgresql_match(model, words, uid, limit):
+    query = ' & '.join(words) + ':*'
+    table = model._meta.db_table
+    scope = 'AND uid_id = %s ' if uid is not None else ''
+    return (
+        f"SELECT id, ts_rank(search, query) FROM {table}, "
+        f"to_tsquery('english', %s) query WHERE search @@ query {scope}"
+        f"ORDER BY 2 DESC LIMIT %s",
+        [query] + ([uid] if uid is not None else []) + [limit])
+
+
+def search(query, uid=None, types=MODELS, limit=20):
+    """Finds the rows of the given types whose name or description match
+
+    All words of the query must match, the last one as a prefix.
+
+    Returns:
+        list -- up to `limit` dicts with the row's model, fields and rank,
+        best match first
+    """
+    words = terms(query)
+    if not words:
+        return []
+
+    ranked = []
+    for name in types:
+        model = MODELS[name]
+        connection = connections[router.db_for_read(model)]
+        if connection.vendor == 'sqlite':
+            sql, params = _sqlite_match(model, words, uid, limit)
+        elif connection.vendor == 'postgresql':
+            sql, params = _postgresql_match(model, words, uid, limit)
+        else:
+            raise NotImplementedError(f'No full-text search for {connection.vendor}')
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            scores = dict(cursor.fetchall())
+
+        rows = model.objects.filter(pk__in=scores).values(
+            'id', 'uid', 'name', 'description', 'type')
+        ranked += [{'model': name, **row, 'rank': scores[row['id']]} for row in rows]
+
+    ranked.sort(key=lambda row: row['rank'], reverse=True)
+    return ranked[:limit]
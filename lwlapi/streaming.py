@@ -0,0 +1,45 @@
+from django.http import StreamingHttpResponse
+from lwlapi.fastpath import iter_values, supports_fast_path
+from lwlapi.renderers import ORJSONRenderer
+
+STREAM_PARAM = 'stream'
+CHUNK_SIZE = 2000
+
+
+def wants_stream(request):
+    """True when the client asked for a streamed list with ?stream=true"""
+    return request.query_params.get(STREAM_PARAM, '').lower() in ('1', 'true', 'yes')
+
+
+def stream_list(queryset, serializer_class, chunk_size=CHUNK_SIZE, selection=None):
+    """Streams a queryset as the same JSON array DRF would render
+
+    Rows are read with .iterator() and rendered one chunk at a time, so
+    memory stays flat however many rows the queryset returns. Expanded
+    relations are prefetched per chunk.
+
+    Returns:
+        StreamingHttpResponse -- JSON array of serialized rows
+    """
+    renderer = ORJSONRenderer()
+    if supports_fast_path(serializer_class, selection):
+        rows = iter_values(queryset, serializer_class, chunk_size, selection)
+    else:
+        serializer = serializer_class(selection=selection)
+        rows = (serializer.to_representation(instance)
+                for instance in queryset.iterator(chunk_size=chunk_size))
+
+    def render():
+        yield b'['
+        chunk = []
+        for position, row in enumerate(rows):
+            if position:
+                chunk.append(b',')
+            chunk.append(renderer.render(row))
+            if (position + 1) % chunk_size == 0:
+                yield b''.join(chunk)
+                chunk = []
+        chunk.append(b']')
+        yield b''.join(chunk)
+
+    return StreamingHttpResponse(render(), content_type=renderer.media_type)
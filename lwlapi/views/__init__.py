@@ -1,4 +1,8 @@
 from .auth import register_user, check_user
+from .stats import cache_stats
+from .batch import batch
+from .search import search
+from .metrics import metrics
 from .user import UserView, UserSerializer
 from .individual import IndividualView, IndividualSerializer
 from .group import GroupView, GroupSerializer
@@ -1,28 +1,38 @@
+from django.db import connection
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from lwlapi.models import User
+from lwlapi.caching import invalidate
 
 
 @api_view(['POST'])
 def register_user(request):
     '''Handles the creation of a new user for authentication
 
+    Registering an existing uid again updates that user's name and bio
+    instead of creating a duplicate, in one INSERT ... ON CONFLICT
+    statement, so retried or concurrent registrations are safe.
+
     Method arguments:
       request -- The full HTTP request object
     '''
 
     # Now save the user info in the wanderlensapi_user table
-    user = User.objects.create(
-        name=request.data['name'],
-        bio=request.data['bio'],
-        uid=request.data['uid']
-    )
+    table = connection.ops.quote_name(User._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (name, bio, uid) VALUES (%s, %s, %s) "
+            "ON CONFLICT (uid) DO UPDATE SET name = excluded.name, bio = excluded.bio "
+            "RETURNING id",
+            [request.data['name'], request.data['bio'], request.data['uid']])
+        user_id = cursor.fetchone()[0]
+    invalidate(user_id)
 
     # Return the user info to the client
     data = {
-        'id': user.id,
-        'uid': user.uid,
-        'bio': user.bio
+        'id': user_id,
+        'uid': request.data['uid'],
+        'bio': request.data['bio']
     }
     return Response(data)
 
@@ -0,0 +1,126 @@
+import io
+import json
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.http import Http404
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from lwlapi import caching
+
+MAX_REQUESTS = 50
+METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+# Headers that describe the outer request's body and must not leak into
+# the sub-requests
+BODY_HEADERS = ('CONTENT_LENGTH', 'CONTENT_TYPE', 'HTTP_CONTENT_ENCODING', 'wsgi.input')
+
+
+class _Failed(Exception):
+    """Aborts an atomic batch after a sub-request failed"""
+
+
+def _sub_request(request, method, path, body):
+    path, _, query = path.partition('?')
+    content = b'' if body is None else json.dumps(body).encode()
+    environ = {key: value for key, value in request.META.items()
+               if key not in BODY_HEADERS}
+    environ.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'SCRIPT_NAME': '',
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(content)),
+        'wsgi.input': io.BytesIO(content),
+    })
+    sub_request = WSGIRequest(environ)
+    if hasattr(request, 'user'):
+        sub_request.user = request.user
+    return path, sub_request
+
+
+def _run(request, item):
+    """Dispatches one sub-request to the view its path resolves to
+
+    Returns:
+        dict -- status, headers and decoded body of the response
+    """
+    if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+        return {'status': status.HTTP_400_BAD_REQUEST,
+                'body': {'message': 'Each request needs a path.'}}
+    method = str(item.get('method', 'GET')).upper()
+    if method not in METHODS:
+        return {'status': status.HTTP_405_METHOD_NOT_ALLOWED,
+                'body': {'message': f'Method {method} is not allowed.'}}
+
+    path, sub_request = _sub_request(request, method, item['path'], item.get('body'))
+    try:
+        match = resolve(path)
+    except Resolver404:
+        match = None
+    if match is None or match.func is batch or match.app_name == 'admin':
+        return {'status': status.HTTP_404_NOT_FOUND,
+                'body': {'message': f'No batchable route for {path}.'}}
+
+    try:
+        response = match.func(sub_request, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+    except Http404 as ex:
+        return {'status': status.HTTP_404_NOT_FOUND, 'body': {'message': str(ex)}}
+    except Exception as ex:
+        return {'status': status.HTTP_500_INTERNAL_SERVER_ERROR, 'body': {'message': str(ex)}}
+
+    if getattr(response, 'data', None) is not None:
+        body = response.data
+    else:
+        content = (b''.join(response.streaming_content)
+                   if response.streaming else response.content)
+        try:
+            body = json.loads(content) if content else None
+        except ValueError:
+            body = content.decode(errors='replace')
+    headers = {header: value for header, value in response.items()
+               if header in ('ETag', 'X-Cache', 'Location')}
+    return {'status': response.status_code, 'headers': headers, 'body': body}
+
+
+@api_view(['POST'])
+def batch(request):
+    '''Runs an ordered list of API requests in one round trip
+
+    Expects {"requests": [{"method": ..., "path": ..., "body": ...}, ...]}
+    and an optional "atomic": true, which runs them in one transaction
+    that is rolled back, and the batch stopped, at the first response
+    of 400 or above. Reads in an atomic batch bypass the response cache
+    and get no ETags, since they may see rows that are rolled back.
+
+    Method arguments:
+      request -- The full HTTP request object
+    '''
+    items = request.data.get('requests') if isinstance(request.data, dict) else None
+    if not isinstance(items, list) or not items:
+        return Response({'message': 'Expected a non-empty "requests" array.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > MAX_REQUESTS:
+        return Response({'message': f'At most {MAX_REQUESTS} requests per batch.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    outer = request._request
+    responses = []
+    if not request.data.get('atomic'):
+        for item in items:
+            responses.append(_run(outer, item))
+        return Response({'responses': responses})
+
+    try:
+        with transaction.atomic(), caching.uncommitted():
+            for item in items:
+                responses.append(_run(outer, item))
+                if responses[-1]['status'] >= status.HTTP_400_BAD_REQUEST:
+                    raise _Failed
+    except _Failed:
+        return Response({'responses': responses, 'committed': False},
+                        status=status.HTTP_400_BAD_REQUEST)
+    return Response({'responses': responses, 'committed': True})
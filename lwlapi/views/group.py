@@ -1,16 +1,26 @@
 from django.http import HttpResponseServerError
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers, status
-from lwlapi.models import Group, User, Story, GroupStory
+from lwlapi.models import Group, User, GroupStory
+from lwlapi.caching import cached_response, if_match, invalidate
+from lwlapi.links import link_to
+from lwlapi.bulk import MAX_ITEMS, bulk_upsert
+from lwlapi.fastpath import serialize_values
+from lwlapi.fieldsets import FieldsMixin, narrow, parse_selection
+from lwlapi.filtering import filter_owned
+from lwlapi.pagination import IdCursorPagination
+from lwlapi.streaming import stream_list, wants_stream
 from rest_framework.decorators import action
+from .user import UserSerializer
 
 
 class GroupView(ViewSet):
     """lwl group view"""
 
+    @cached_response(Group)
     def retrieve(self, request, pk):
         """Handle GET requests for single group
 
@@ -18,26 +28,43 @@ class GroupView(ViewSet):
             Response -- JSON serialized group
         """
         try:
-            group = Group.objects.get(pk=pk)
-            serializer = GroupSerializer(group)
+            selection = parse_selection(request.query_params, GroupSerializer)
+        except ValueError as ex:
+            return Response({'message': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            group = narrow(Group.objects.all(), GroupSerializer, selection).get(pk=pk)
+            serializer = GroupSerializer(group, selection=selection)
             return Response(serializer.data)
         except Group.DoesNotExist as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
 
+    @cached_response(Group)
     def list(self, request):
         """Handle GET requests to get all groupS
 
         Returns:
             Response -- JSON serialized list of groups
         """
-        groups = Group.objects.all()
+        try:
+            groups, ordering = filter_owned(Group.objects.all(), request.query_params)
+            selection = parse_selection(request.query_params, GroupSerializer)
+        except ValueError as ex:
+            return Response({'message': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = IdCursorPagination()
+        if ordering is not None:
+            paginator.ordering = ordering
+        groups = narrow(groups, GroupSerializer, selection, ordering)
+        page = paginator.paginate_queryset(groups, request, view=self)
+        if page is not None:
+            serializer = GroupSerializer(page, many=True, selection=selection)
+            return paginator.get_paginated_response(serializer.data)
 
-        uid = request.query_params.get('uid', None)
-        if uid is not None:
-            groups = groups.filter(uid=uid)
+        if wants_stream(request):
+            return stream_list(groups, GroupSerializer, selection=selection)
 
-        serializer = GroupSerializer(groups, many=True)
-        return Response(serializer.data)
+        return Response(serialize_values(groups, GroupSerializer, selection))
 
     def create(self, request, format=None):
         """Handle POST operations
@@ -45,6 +72,9 @@ class GroupView(ViewSet):
         Returns:
             Response -- JSON serialized group instance
         """
+        if isinstance(request.data, list):
+            return self.bulk(request)
+
         uid = request.data.get("uid")
         user = User.objects.get(uid=uid)
         try:
@@ -54,6 +84,7 @@ class GroupView(ViewSet):
                 description=request.data["description"],
                 type=request.data["type"],
             )
+            invalidate(user.id)
             serializer = GroupSerializer(group)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except User.DoesNotExist:
@@ -61,6 +92,32 @@ class GroupView(ViewSet):
         except Exception as ex:
             return Response({'message': str(ex)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(methods=['post'], detail=False)
+    def bulk(self, request):
+        """Handle POST requests with a JSON array of groups
+
+        Items whose (uid, external_id) already exists update that group.
+
+        Returns:
+            Response -- per-item results, 201 once every item is written
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({'message': 'Expected a non-empty JSON array.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > MAX_ITEMS:
+            return Response({'message': f'At most {MAX_ITEMS} items per request.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            results, owners = bulk_upsert(Group, items)
+        except IntegrityError:
+            return Response({'message': 'A concurrent import wrote the same external_id; retry.'}, status=status.HTTP_409_CONFLICT)
+
+        if owners is None:
+            return Response({'results': results}, status=status.HTTP_400_BAD_REQUEST)
+        invalidate(*owners)
+        return Response({'results': results}, status=status.HTTP_201_CREATED)
+
+    @if_match(Group)
     def update(self, request, pk):
         """Handle PUT requests for a group
 
@@ -69,6 +126,7 @@ class GroupView(ViewSet):
         """
         try:
             group = Group.objects.get(pk=pk)
+            previous_owner = group.uid_id
             uid = User.objects.get(pk=request.data["uid"])
             group.uid = uid
             group.name = request.data["name"]
@@ -77,6 +135,7 @@ class GroupView(ViewSet):
             serializer = GroupSerializer(group, data=request.data)
             if serializer.is_valid():
                 serializer.save()
+                invalidate(previous_owner, group.uid_id)
                 return Response(serializer.data, status=status.HTTP_200_OK)
             else:
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -85,6 +144,7 @@ class GroupView(ViewSet):
         except Exception as ex:
             return Response({'message': str(ex)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @if_match(Group)
     def destroy(self, request, pk):
         """Handle DELETE requests for a group
 
@@ -94,6 +154,7 @@ class GroupView(ViewSet):
         try:
             group = Group.objects.get(pk=pk)
             group.delete()
+            invalidate(group.uid_id)
             return Response(None, status=status.HTTP_204_NO_CONTENT)
         except Group.DoesNotExist as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
@@ -108,34 +169,23 @@ class GroupView(ViewSet):
         if not story_ids:
             return Response({'message': 'No story IDs provided.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        added_stories = []
-        existing_stories = []
-
         try:
             with transaction.atomic():
-                # Fetch all stories at once to reduce the number of database queries
-                stories = Story.objects.filter(id__in=story_ids)
-                existing_story_ids = GroupStory.objects.filter(
-                    group=group, story__in=stories).values_list('story_id', flat=True)
-
-                # Determine which stories are new and which already exist
-                for story in stories:
-                    if story.id not in existing_story_ids:
-                        GroupStory.objects.create(
-                            group=group, story=story)
-                        added_stories.append(story.id)
-                    else:
-                        existing_stories.append(story.id)
+                added_stories, existing_stories, missing_stories = link_to(
+                    GroupStory, 'group', group, 'story', story_ids)
+
+            invalidate(group.uid_id)
 
             response_data = {
                 'added_stories': added_stories,
-                'existing_stories': existing_stories
+                'existing_stories': existing_stories,
+                'missing_stories': missing_stories
             }
 
             return Response(response_data, status=status.HTTP_200_OK)
 
-        except Story.DoesNotExist:
-            return Response({'message': 'One or more stories do not exist.'}, status=status.HTTP_404_NOT_FOUND)
+        except (TypeError, ValueError):
+            return Response({'message': 'Story IDs must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -145,20 +195,14 @@ class GroupView(ViewSet):
         groupstory = GroupStory.objects.get(
             group=group, story=request.data['storyId'])
         groupstory.delete()
+        invalidate(group.uid_id)
 
         return Response(None, status=status.HTTP_200_OK)
 
 
-class GroupSerializer(serializers.ModelSerializer):
+class GroupSerializer(FieldsMixin, serializers.ModelSerializer):
     """JSON serializer for groups"""
     class Meta:
         model = Group
         fields = ('id', 'uid', 'name', 'description', 'type')
-
-
-class GroupStorySerializer(serializers.ModelSerializer):
-    """JSON serializer for groups"""
-    class Meta:
-        model = GroupStory
-        fields = ('id', 'group', 'story')
-        depth = 1
+        expandable = {'uid': UserSerializer}
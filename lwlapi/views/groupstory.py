@@ -3,10 +3,14 @@ from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers, status
 from lwlapi.models import Group, GroupStory
+from lwlapi.caching import conditional_response
+from lwlapi.fieldsets import FieldsMixin, narrow, parse_selection
+from lwlapi.pagination import IdCursorPagination
+from lwlapi.streaming import stream_list, wants_stream
 from rest_framework.decorators import action
 
 
-class GroupStorySerializer(serializers.ModelSerializer):
+class GroupStorySerializer(FieldsMixin, serializers.ModelSerializer):
     """JSON serializer for groups"""
     class Meta:
         model = GroupStory
@@ -16,9 +20,10 @@ class GroupStorySerializer(serializers.ModelSerializer):
 
 class GroupStoryView(ViewSet):
     """lwl group view"""
-    queryset = GroupStory.objects.all()
+    queryset = GroupStory.objects.select_related('group', 'story')
     serializer_class = GroupStorySerializer
 
+    @conditional_response
     def retrieve(self, request, pk):
         """Handle GET requests for single group
 
@@ -26,32 +31,57 @@ class GroupStoryView(ViewSet):
             Response -- JSON serialized group
         """
         try:
-            groupstory = GroupStory.objects.get(pk=pk)
-            serializer = GroupStorySerializer(groupstory)
+            selection = parse_selection(request.query_params, GroupStorySerializer)
+        except ValueError as ex:
+            return Response({'message': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            groupstory = narrow(self.queryset.all(), GroupStorySerializer, selection).get(pk=pk)
+            serializer = GroupStorySerializer(groupstory, selection=selection)
             return Response(serializer.data)
         except Group.DoesNotExist as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
 
+    @conditional_response
     def list(self, request):
         """Handle GET requests to get all groupS
 
         Returns:
             Response -- JSON serialized list of groups
         """
-        groupstory = GroupStory.objects.all()
-        serializer = GroupStorySerializer(groupstory, many=True)
+        try:
+            selection = parse_selection(request.query_params, GroupStorySerializer)
+        except ValueError as ex:
+            return Response({'message': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
+
+        groupstory = narrow(self.queryset.all(), GroupStorySerializer, selection)
+        paginator = IdCursorPagination()
+        page = paginator.paginate_queryset(groupstory, request, view=self)
+        if page is not None:
+            serializer = GroupStorySerializer(page, many=True, selection=selection)
+            return paginator.get_paginated_response(serializer.data)
+
+        if wants_stream(request):
+            return stream_list(groupstory, GroupStorySerializer, selection=selection)
+
+        serializer = GroupStorySerializer(groupstory, many=True, selection=selection)
         return Response(serializer.data)
 
     @action(methods=['get'], detail=False)
+    @conditional_response
     def stories_by_group(self, request):
 
         # Get the group ID from query parameters
         group_id = request.query_params.get('group_id')
         if not group_id:
             return Response({'error': 'group_id query parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            selection = parse_selection(request.query_params, GroupStorySerializer)
+        except ValueError as ex:
+            return Response({'error': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
 
         # Filter GroupStorys by a group_id
-        group_stories = GroupStory.objects.filter(
+        group_stories = narrow(self.queryset.all(), GroupStorySerializer, selection).filter(
             group_id=group_id)
         if not group_stories.exists():
             return Response(
@@ -60,19 +90,24 @@ class GroupStoryView(ViewSet):
             )
 
         # Serialize the filtered data
-        serializer = GroupStorySerializer(group_stories, many=True)
+        serializer = GroupStorySerializer(group_stories, many=True, selection=selection)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     @action(methods=['get'], detail=False)
+    @conditional_response
     def groups_by_stories(self, request):
 
         # Get the group ID from query parameters
         story_id = request.query_params.get('story_id')
         if not story_id:
             return Response({'error': 'story_id query parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            selection = parse_selection(request.query_params, GroupStorySerializer)
+        except ValueError as ex:
+            return Response({'error': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
 
         # Filter GroupStorys by a group_id
-        group_stories = GroupStory.objects.filter(
+        group_stories = narrow(self.queryset.all(), GroupStorySerializer, selection).filter(
             story_id=story_id)
         if not group_stories.exists():
             return Response(
@@ -81,5 +116,5 @@ class GroupStoryView(ViewSet):
             )
 
         # Serialize the filtered data
-        serializer = GroupStorySerializer(group_stories, many=True)
+        serializer = GroupStorySerializer(group_stories, many=True, selection=selection)
         return Response(serializer.data, status=status.HTTP_200_OK)
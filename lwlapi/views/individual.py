@@ -1,16 +1,26 @@
 from django.http import HttpResponseServerError
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers, status
-from lwlapi.models import Individual, User, Story, IndividualStory
+from lwlapi.models import Individual, User, IndividualStory
+from lwlapi.caching import cached_response, if_match, invalidate
+from lwlapi.links import link_to
+from lwlapi.bulk import MAX_ITEMS, bulk_upsert
+from lwlapi.fastpath import serialize_values
+from lwlapi.fieldsets import FieldsMixin, narrow, parse_selection
+from lwlapi.filtering import filter_owned
+from lwlapi.pagination import IdCursorPagination
+from lwlapi.streaming import stream_list, wants_stream
 from rest_framework.decorators import action
+from .user import UserSerializer
 
 
 class IndividualView(ViewSet):
     """lwl individual view"""
 
+    @cached_response(Individual)
     def retrieve(self, request, pk):
         """Handle GET requests for single individual
 
@@ -18,26 +28,43 @@ class IndividualView(ViewSet):
             Response -- JSON serialized individual
         """
         try:
-            individual = Individual.objects.get(pk=pk)
-            serializer = IndividualSerializer(individual)
+            selection = parse_selection(request.query_params, IndividualSerializer)
+        except ValueError as ex:
+            return Response({'message': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            individual = narrow(Individual.objects.all(), IndividualSerializer, selection).get(pk=pk)
+            serializer = IndividualSerializer(individual, selection=selection)
             return Response(serializer.data)
         except Individual.DoesNotExist as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
 
+    @cached_response(Individual)
     def list(self, request):
         """Handle GET requests to get all individualS
 
         Returns:
             Response -- JSON serialized list of individualS
         """
-        individuals = Individual.objects.all()
+        try:
+            individuals, ordering = filter_owned(Individual.objects.all(), request.query_params)
+            selection = parse_selection(request.query_params, IndividualSerializer)
+        except ValueError as ex:
+            return Response({'message': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = IdCursorPagination()
+        if ordering is not None:
+            paginator.ordering = ordering
+        individuals = narrow(individuals, IndividualSerializer, selection, ordering)
+        page = paginator.paginate_queryset(individuals, request, view=self)
+        if page is not None:
+            serializer = IndividualSerializer(page, many=True, selection=selection)
+            return paginator.get_paginated_response(serializer.data)
 
-        uid = request.query_params.get('uid', None)
-        if uid is not None:
-            individuals = individuals.filter(uid=uid)
+        if wants_stream(request):
+            return stream_list(individuals, IndividualSerializer, selection=selection)
 
-        serializer = IndividualSerializer(individuals, many=True)
-        return Response(serializer.data)
+        return Response(serialize_values(individuals, IndividualSerializer, selection))
 
     def create(self, request, format=None):
         """Handle POST operations
@@ -45,6 +72,9 @@ class IndividualView(ViewSet):
         Returns:
             Response -- JSON serialized individual instance
         """
+        if isinstance(request.data, list):
+            return self.bulk(request)
+
         uid = request.data.get("uid")
         user = User.objects.get(uid=uid)
         try:
@@ -54,6 +84,7 @@ class IndividualView(ViewSet):
                 description=request.data["description"],
                 type=request.data["type"],
             )
+            invalidate(user.id)
             serializer = IndividualSerializer(individual)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except User.DoesNotExist:
@@ -61,6 +92,32 @@ class IndividualView(ViewSet):
         except Exception as ex:
             return Response({'message': str(ex)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(methods=['post'], detail=False)
+    def bulk(self, request):
+        """Handle POST requests with a JSON array of individuals
+
+        Items whose (uid, external_id) already exists update that individual.
+
+        Returns:
+            Response -- per-item results, 201 once every item is written
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({'message': 'Expected a non-empty JSON array.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > MAX_ITEMS:
+            return Response({'message': f'At most {MAX_ITEMS} items per request.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            results, owners = bulk_upsert(Individual, items)
+        except IntegrityError:
+            return Response({'message': 'A concurrent import wrote the same external_id; retry.'}, status=status.HTTP_409_CONFLICT)
+
+        if owners is None:
+            return Response({'results': results}, status=status.HTTP_400_BAD_REQUEST)
+        invalidate(*owners)
+        return Response({'results': results}, status=status.HTTP_201_CREATED)
+
+    @if_match(Individual)
     def update(self, request, pk):
         """Handle PUT requests for a individual
 
@@ -69,6 +126,7 @@ class IndividualView(ViewSet):
         """
         try:
             individual = Individual.objects.get(pk=pk)
+            previous_owner = individual.uid_id
             uid = User.objects.get(pk=request.data["uid"])
             individual.uid = uid
             individual.name = request.data["name"]
@@ -77,6 +135,7 @@ class IndividualView(ViewSet):
             serializer = IndividualSerializer(individual, data=request.data)
             if serializer.is_valid():
                 serializer.save()
+                invalidate(previous_owner, individual.uid_id)
                 return Response(serializer.data, status=status.HTTP_200_OK)
             else:
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -85,6 +144,7 @@ class IndividualView(ViewSet):
         except Exception as ex:
             return Response({'message': str(ex)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @if_match(Individual)
     def destroy(self, request, pk):
         """Handle DELETE requests for a individual
 
@@ -94,6 +154,7 @@ class IndividualView(ViewSet):
         try:
             individual = Individual.objects.get(pk=pk)
             individual.delete()
+            invalidate(individual.uid_id)
             return Response(None, status=status.HTTP_204_NO_CONTENT)
         except Individual.DoesNotExist as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
@@ -108,34 +169,23 @@ class IndividualView(ViewSet):
         if not story_ids:
             return Response({'message': 'No story IDs provided.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        added_stories = []
-        existing_stories = []
-
         try:
             with transaction.atomic():
-                # Fetch all stories at once to reduce the number of database queries
-                stories = Story.objects.filter(id__in=story_ids)
-                existing_story_ids = IndividualStory.objects.filter(
-                    individual=individual, story__in=stories).values_list('story_id', flat=True)
-
-                # Determine which stories are new and which already exist
-                for story in stories:
-                    if story.id not in existing_story_ids:
-                        IndividualStory.objects.create(
-                            individual=individual, story=story)
-                        added_stories.append(story.id)
-                    else:
-                        existing_stories.append(story.id)
+                added_stories, existing_stories, missing_stories = link_to(
+                    IndividualStory, 'individual', individual, 'story', story_ids)
+
+            invalidate(individual.uid_id)
 
             response_data = {
                 'added_stories': added_stories,
-                'existing_stories': existing_stories
+                'existing_stories': existing_stories,
+                'missing_stories': missing_stories
             }
 
             return Response(response_data, status=status.HTTP_200_OK)
 
-        except Story.DoesNotExist:
-            return Response({'message': 'One or more stories do not exist.'}, status=status.HTTP_404_NOT_FOUND)
+        except (TypeError, ValueError):
+            return Response({'message': 'Story IDs must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -196,20 +246,14 @@ class IndividualView(ViewSet):
         individualstory = IndividualStory.objects.get(
             individual=individual, story=request.data['storyId'])
         individualstory.delete()
+        invalidate(individual.uid_id)
 
         return Response(None, status=status.HTTP_200_OK)
 
 
-class IndividualSerializer(serializers.ModelSerializer):
+class IndividualSerializer(FieldsMixin, serializers.ModelSerializer):
     """JSON serializer for individuals"""
     class Meta:
         model = Individual
         fields = ('id', 'uid', 'name', 'description', 'type')
-
-
-class IndividualStorySerializer(serializers.ModelSerializer):
-    """JSON serializer for individuals"""
-    class Meta:
-        model = IndividualStory
-        fields = ('id', 'individual', 'story')
-        depth = 1
+        expandable = {'uid': UserSerializer}
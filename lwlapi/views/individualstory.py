@@ -3,10 +3,14 @@ from rest_framework.viewsets import ModelViewSet
 from rest_framework.response import Response
 from rest_framework import serializers, status
 from lwlapi.models import Individual, IndividualStory
+from lwlapi.caching import conditional_response, invalidate
+from lwlapi.fieldsets import FieldsMixin, narrow, parse_selection
+from lwlapi.pagination import IdCursorPagination
+from lwlapi.streaming import stream_list, wants_stream
 from rest_framework.decorators import action
 
 
-class IndividualStorySerializer(serializers.ModelSerializer):
+class IndividualStorySerializer(FieldsMixin, serializers.ModelSerializer):
     """JSON serializer for individuals"""
     class Meta:
         model = IndividualStory
@@ -16,9 +20,22 @@ class IndividualStorySerializer(serializers.ModelSerializer):
 
 class IndividualStoryView(ModelViewSet):
     """lwl individual view"""
-    queryset = IndividualStory.objects.all()
+    queryset = IndividualStory.objects.select_related('individual', 'story')
     serializer_class = IndividualStorySerializer
 
+    def perform_create(self, serializer):
+        serializer.save()
+        invalidate()
+
+    def perform_update(self, serializer):
+        serializer.save()
+        invalidate()
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        invalidate()
+
+    @conditional_response
     def retrieve(self, request, pk):
         """Handle GET requests for single individual
 
@@ -26,12 +43,18 @@ class IndividualStoryView(ModelViewSet):
             Response -- JSON serialized individual
         """
         try:
-            individualstory = IndividualStory.objects.get(pk=pk)
-            serializer = IndividualStorySerializer(individualstory)
+            selection = parse_selection(request.query_params, IndividualStorySerializer)
+        except ValueError as ex:
+            return Response({'message': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            individualstory = narrow(self.queryset.all(), IndividualStorySerializer, selection).get(pk=pk)
+            serializer = IndividualStorySerializer(individualstory, selection=selection)
             return Response(serializer.data)
         except IndividualStory.DoesNotExist as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
 
+    @conditional_response
     def list(self, request):
         """Handle GET requests to get all individuals
 
@@ -39,7 +62,12 @@ class IndividualStoryView(ModelViewSet):
             Response -- JSON serialized list of individuals
         """
 
-        individualstory = IndividualStory.objects.all()
+        try:
+            selection = parse_selection(request.query_params, IndividualStorySerializer)
+        except ValueError as ex:
+            return Response({'message': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
+
+        individualstory = narrow(self.queryset.all(), IndividualStorySerializer, selection)
 
         # individual_id = request.query_params.get('individual_id', None)
         # if uid is not None:
@@ -49,10 +77,20 @@ class IndividualStoryView(ModelViewSet):
         # if uid is not None:
         #     individualstory = individualstory.filter(uid=uid)
 
-        serializer = IndividualStorySerializer(individualstory, many=True)
+        paginator = IdCursorPagination()
+        page = paginator.paginate_queryset(individualstory, request, view=self)
+        if page is not None:
+            serializer = IndividualStorySerializer(page, many=True, selection=selection)
+            return paginator.get_paginated_response(serializer.data)
+
+        if wants_stream(request):
+            return stream_list(individualstory, IndividualStorySerializer, selection=selection)
+
+        serializer = IndividualStorySerializer(individualstory, many=True, selection=selection)
         return Response(serializer.data)
 
     @action(methods=['get'], detail=False)
+    @conditional_response
     def stories_by_individual(self, request):
 
         # print("Accessed stories_by_individual action")
@@ -60,9 +98,13 @@ class IndividualStoryView(ModelViewSet):
         individual_id = request.query_params.get('individual_id')
         if not individual_id:
             return Response({'error': 'individual_id query parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            selection = parse_selection(request.query_params, IndividualStorySerializer)
+        except ValueError as ex:
+            return Response({'error': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
 
         # Filter IndividualStorys by an individual_id
-        individual_stories = IndividualStory.objects.filter(
+        individual_stories = narrow(self.queryset.all(), IndividualStorySerializer, selection).filter(
             individual_id=individual_id)
         if not individual_stories.exists():
             return Response(
@@ -71,19 +113,24 @@ class IndividualStoryView(ModelViewSet):
             )
 
         # Serialize the filtered data
-        serializer = IndividualStorySerializer(individual_stories, many=True)
+        serializer = IndividualStorySerializer(individual_stories, many=True, selection=selection)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     @action(methods=['get'], detail=False)
+    @conditional_response
     def individuals_by_stories(self, request):
 
         # Get the group ID from query parameters
         story_id = request.query_params.get('story_id')
         if not story_id:
             return Response({'error': 'story_id query parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            selection = parse_selection(request.query_params, IndividualStorySerializer)
+        except ValueError as ex:
+            return Response({'error': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
 
         # Filter GroupStorys by a group_id
-        individual_stories = IndividualStory.objects.filter(
+        individual_stories = narrow(self.queryset.all(), IndividualStorySerializer, selection).filter(
             story_id=story_id)
         if not individual_stories.exists():
             return Response(
@@ -92,5 +139,5 @@ class IndividualStoryView(ModelViewSet):
             )
 
         # Serialize the filtered data
-        serializer = IndividualStorySerializer(individual_stories, many=True)
+        serializer = IndividualStorySerializer(individual_stories, many=True, selection=selection)
         return Response(serializer.data, status=status.HTTP_200_OK)
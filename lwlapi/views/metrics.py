@@ -0,0 +1,14 @@
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from lwlapi import metrics as registry
+
+
+@require_GET
+def metrics(request):
+    '''Serves the request metrics in the Prometheus text format
+
+    Method arguments:
+      request -- The full HTTP request object
+    '''
+    return HttpResponse(registry.exposition(registry.collect()),
+                        content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,44 @@
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from lwlapi import search as index
+
+
+@api_view(['GET'])
+def search(request):
+    '''Full-text search over stories, individuals and groups
+
+    Query parameters:
+      q -- words that must all appear in the name or description; the
+           last one may be the start of a word
+      uid -- optional id of the user whose records to search
+      model -- optional comma-separated subset of story,individual,group
+      limit -- number of results, best match first (default 20, max 100)
+
+    Method arguments:
+      request -- The full HTTP request object
+    '''
+    query = request.query_params.get('q', '')
+    if not index.terms(query):
+        return Response({'message': 'Expected a search query in "q".'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    types = request.query_params.get('model')
+    types = types.split(',') if types else list(index.MODELS)
+    unknown = [name for name in types if name not in index.MODELS]
+    if unknown:
+        return Response({'message': f'Unknown model: {", ".join(unknown)}.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        uid = request.query_params.get('uid')
+        uid = int(uid) if uid is not None else None
+        limit = int(request.query_params.get('limit', 20))
+    except ValueError:
+        return Response({'message': 'uid and limit must be integers.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if not 0 < limit <= index.MAX_LIMIT:
+        return Response({'message': f'limit must be between 1 and {index.MAX_LIMIT}.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({'results': index.search(query, uid, types, limit)})
@@ -0,0 +1,13 @@
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from lwlapi import caching
+
+
+@api_view(['GET'])
+def cache_stats(request):
+    '''Reports the response cache hit and miss counters
+
+    Method arguments:
+      request -- The full HTTP request object
+    '''
+    return Response(caching.stats())
@@ -3,14 +3,26 @@ from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers, status
 from lwlapi.models import Story, User, Individual, IndividualStory, Group, GroupStory
-from django.db import transaction
+from lwlapi.caching import cached_response, conditional_response, if_match, invalidate
+from lwlapi.links import link_to
+from lwlapi.bulk import MAX_ITEMS, bulk_upsert
+from lwlapi.fastpath import serialize_values
+from lwlapi.fieldsets import FieldsMixin, narrow, parse_selection
+from lwlapi.filtering import filter_owned
+from lwlapi.pagination import IdCursorPagination
+from lwlapi.streaming import stream_list, wants_stream
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
 from rest_framework.decorators import action
+from .user import UserSerializer
+from .individual import IndividualSerializer
+from .group import GroupSerializer
 
 
 class StoryView(ViewSet):
     """lwl story view"""
 
+    @cached_response(Story)
     def retrieve(self, request, pk):
         """Handle GET requests for single story
 
@@ -18,26 +30,43 @@ class StoryView(ViewSet):
             Response -- JSON serialized story
         """
         try:
-            story = Story.objects.get(pk=pk)
-            serializer = StorySerializer(story)
+            selection = parse_selection(request.query_params, StorySerializer)
+        except ValueError as ex:
+            return Response({'message': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            story = narrow(Story.objects.all(), StorySerializer, selection).get(pk=pk)
+            serializer = StorySerializer(story, selection=selection)
             return Response(serializer.data)
         except Story.DoesNotExist as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
 
+    @cached_response(Story)
     def list(self, request):
         """Handle GET requests to get all StoryS
 
         Returns:
             Response -- JSON serialized list of StoryS
         """
-        stories = Story.objects.all()
+        try:
+            stories, ordering = filter_owned(Story.objects.all(), request.query_params)
+            selection = parse_selection(request.query_params, StorySerializer)
+        except ValueError as ex:
+            return Response({'message': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
 
-        uid = request.query_params.get('uid', None)
-        if uid is not None:
-            stories = stories.filter(uid=uid)
+        paginator = IdCursorPagination()
+        if ordering is not None:
+            paginator.ordering = ordering
+        stories = narrow(stories, StorySerializer, selection, ordering)
+        page = paginator.paginate_queryset(stories, request, view=self)
+        if page is not None:
+            serializer = StorySerializer(page, many=True, selection=selection)
+            return paginator.get_paginated_response(serializer.data)
 
-        serializer = StorySerializer(stories, many=True)
-        return Response(serializer.data)
+        if wants_stream(request):
+            return stream_list(stories, StorySerializer, selection=selection)
+
+        return Response(serialize_values(stories, StorySerializer, selection))
 
     def create(self, request, format=None):
         """Handle POST operations
@@ -45,6 +74,9 @@ class StoryView(ViewSet):
         Returns:
             Response -- JSON serialized story instance
         """
+        if isinstance(request.data, list):
+            return self.bulk(request)
+
         uid = request.data.get("uid")
         if not uid:
             return Response({'message': 'UID is required'}, status=status.HTTP_400_BAD_REQUEST)
@@ -61,6 +93,7 @@ class StoryView(ViewSet):
                 description=request.data["description"],
                 type=request.data["type"],
             )
+            invalidate(user.id)
             serializer = StorySerializer(story)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except Exception as ex:
@@ -89,6 +122,32 @@ class StoryView(ViewSet):
         # except Exception as ex:
         #     return Response({'message': str(ex)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(methods=['post'], detail=False)
+    def bulk(self, request):
+        """Handle POST requests with a JSON array of storys
+
+        Items whose (uid, external_id) already exists update that story.
+
+        Returns:
+            Response -- per-item results, 201 once every item is written
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({'message': 'Expected a non-empty JSON array.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > MAX_ITEMS:
+            return Response({'message': f'At most {MAX_ITEMS} items per request.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            results, owners = bulk_upsert(Story, items)
+        except IntegrityError:
+            return Response({'message': 'A concurrent import wrote the same external_id; retry.'}, status=status.HTTP_409_CONFLICT)
+
+        if owners is None:
+            return Response({'results': results}, status=status.HTTP_400_BAD_REQUEST)
+        invalidate(*owners)
+        return Response({'results': results}, status=status.HTTP_201_CREATED)
+
+    @if_match(Story)
     def update(self, request, pk):
         """Handle PUT requests for a story
 
@@ -97,6 +156,7 @@ class StoryView(ViewSet):
         """
         try:
             story = Story.objects.get(pk=pk)
+            previous_owner = story.uid_id
             uid = User.objects.get(pk=request.data["uid"])
             story.uid = uid
             story.name = request.data["name"]
@@ -105,6 +165,7 @@ class StoryView(ViewSet):
             serializer = StorySerializer(story, data=request.data)
             if serializer.is_valid():
                 serializer.save()
+                invalidate(previous_owner, story.uid_id)
                 return Response(serializer.data, status=status.HTTP_200_OK)
             else:
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -113,6 +174,7 @@ class StoryView(ViewSet):
         except Exception as ex:
             return Response({'message': str(ex)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @if_match(Story)
     def destroy(self, request, pk):
         """Handle DELETE requests for a story
 
@@ -122,6 +184,7 @@ class StoryView(ViewSet):
         try:
             story = Story.objects.get(pk=pk)
             story.delete()
+            invalidate(story.uid_id)
             return Response(None, status=status.HTTP_204_NO_CONTENT)
         except Story.DoesNotExist as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
@@ -136,34 +199,23 @@ class StoryView(ViewSet):
         if not individual_ids:
             return Response({'message': 'No individual IDs provided.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        added_individuals = []
-        existing_individuals = []
-
         try:
             with transaction.atomic():
-                # Fetch all individuals at once to reduce the number of database queries
-                individuals = Individual.objects.filter(id__in=individual_ids)
-                existing_individual_ids = IndividualStory.objects.filter(
-                    story=story, individual__in=individuals).values_list('individual_id', flat=True)
-
-                # Determine which individuals are new and which already exist
-                for individual in individuals:
-                    if individual.id not in existing_individual_ids:
-                        IndividualStory.objects.create(
-                            story=story, individual=individual)
-                        added_individuals.append(individual.id)
-                    else:
-                        existing_individuals.append(individual.id)
+                added_individuals, existing_individuals, missing_individuals = link_to(
+                    IndividualStory, 'story', story, 'individual', individual_ids)
+
+            invalidate(story.uid_id)
 
             response_data = {
                 'added_individuals': added_individuals,
-                'existing_individuals': existing_individuals
+                'existing_individuals': existing_individuals,
+                'missing_individuals': missing_individuals
             }
 
             return Response(response_data, status=status.HTTP_200_OK)
 
-        except Individual.DoesNotExist:
-            return Response({'message': 'One or more individuals do not exist.'}, status=status.HTTP_404_NOT_FOUND)
+        except (TypeError, ValueError):
+            return Response({'message': 'Individual IDs must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -175,37 +227,63 @@ class StoryView(ViewSet):
         if not group_ids:
             return Response({'message': 'No group IDs provided.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        added_groups = []
-        existing_groups = []
-
         try:
             with transaction.atomic():
-                # Fetch all groups at once to reduce the number of database queries
-                groups = Group.objects.filter(id__in=group_ids)
-                existing_group_ids = GroupStory.objects.filter(
-                    story=story, group__in=groups).values_list('group_id', flat=True)
-
-                # Determine which groups are new and which already exist
-                for group in groups:
-                    if group.id not in existing_group_ids:
-                        GroupStory.objects.create(
-                            story=story, group=group)
-                        added_groups.append(group.id)
-                    else:
-                        existing_groups.append(group.id)
+                added_groups, existing_groups, missing_groups = link_to(
+                    GroupStory, 'story', story, 'group', group_ids)
+
+            invalidate(story.uid_id)
 
             response_data = {
                 'added_groups': added_groups,
-                'existing_groups': existing_groups
+                'existing_groups': existing_groups,
+                'missing_groups': missing_groups
             }
 
             return Response(response_data, status=status.HTTP_200_OK)
 
-        except Group.DoesNotExist:
-            return Response({'message': 'One or more groups do not exist.'}, status=status.HTTP_404_NOT_FOUND)
+        except (TypeError, ValueError):
+            return Response({'message': 'Group IDs must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(methods=['get'], detail=True)
+    @conditional_response
+    def graph(self, request, pk):
+        """Handle GET requests for a story with everyone linked to it
+
+        Takes optional ?individuals_limit= and ?groups_limit= query
+        parameters. Always runs three queries, however many links exist.
+
+        Returns:
+            Response -- JSON serialized story with individuals and groups
+        """
+        try:
+            limits = {
+                name: int(request.query_params[name])
+                for name in ('individuals_limit', 'groups_limit')
+                if name in request.query_params
+            }
+        except ValueError:
+            return Response({'message': 'Limits must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+        if any(limit < 0 for limit in limits.values()):
+            return Response({'message': 'Limits must not be negative.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            story = Story.objects.get(pk=pk)
+        except Story.DoesNotExist as ex:
+            return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
+
+        individuals = Individual.objects.filter(
+            individual_storys__story=story).order_by('id')[:limits.get('individuals_limit')]
+        groups = Group.objects.filter(
+            group_storys__story=story).order_by('id')[:limits.get('groups_limit')]
+
+        data = StorySerializer(story).data
+        data['individuals'] = IndividualSerializer(individuals, many=True).data
+        data['groups'] = GroupSerializer(groups, many=True).data
+        return Response(data)
+
     @action(methods=['delete'], detail=True)
     def remove_individual_from_story(self, request, pk):
         try:
@@ -213,6 +291,7 @@ class StoryView(ViewSet):
             individualstory = IndividualStory.objects.get(
                 story=story, individual=request.data['individualId'])
             individualstory.delete()
+            invalidate(story.uid_id)
 
             return Response(None, status=status.HTTP_200_OK)
         except IndividualStory.DoesNotExist:
@@ -225,15 +304,17 @@ class StoryView(ViewSet):
             groupstory = GroupStory.objects.get(
                 story=story, group=request.data['groupId'])
             groupstory.delete()
+            invalidate(story.uid_id)
 
             return Response(None, status=status.HTTP_200_OK)
         except IndividualStory.DoesNotExist:
             return Response({'message': 'Relationship not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
-class StorySerializer(serializers.ModelSerializer):
+class StorySerializer(FieldsMixin, serializers.ModelSerializer):
     """JSON serializer for Storys"""
     class Meta:
         model = Story
         fields = ('id', 'uid', 'name', 'description', 'type')
+        expandable = {'uid': UserSerializer}
         # depth = 1
@@ -3,11 +3,17 @@ from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers, status
 from lwlapi.models import User
+from lwlapi.caching import cached_response, if_match, invalidate
+from lwlapi.fastpath import serialize_values
+from lwlapi.fieldsets import FieldsMixin, narrow, parse_selection
+from lwlapi.pagination import IdCursorPagination
+from lwlapi.streaming import stream_list, wants_stream
 
 
 class UserView(ViewSet):
     """Tuna API users view"""
 
+    @cached_response(User, owner_field='id', owner_param=None)
     def retrieve(self, request, pk):
         """Handle GET requests for single User
 
@@ -15,21 +21,40 @@ class UserView(ViewSet):
             Response -- JSON serialized User
         """
         try:
-            user = User.objects.get(pk=pk)
-            serializer = UserSerializer(user)
+            selection = parse_selection(request.query_params, UserSerializer)
+        except ValueError as ex:
+            return Response({'message': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            user = narrow(User.objects.all(), UserSerializer, selection).get(pk=pk)
+            serializer = UserSerializer(user, selection=selection)
             return Response(serializer.data)
         except User.DoesNotExist as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
 
+    @cached_response(User, owner_field='id', owner_param=None)
     def list(self, request):
         """Handle GET requests to get all Users
 
         Returns:
             Response -- JSON serialized list of users
         """
-        users = User.objects.all()
-        serializer = UserSerializer(users, many=True)
-        return Response(serializer.data)
+        try:
+            selection = parse_selection(request.query_params, UserSerializer)
+        except ValueError as ex:
+            return Response({'message': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
+
+        users = narrow(User.objects.all(), UserSerializer, selection)
+        paginator = IdCursorPagination()
+        page = paginator.paginate_queryset(users, request, view=self)
+        if page is not None:
+            serializer = UserSerializer(page, many=True, selection=selection)
+            return paginator.get_paginated_response(serializer.data)
+
+        if wants_stream(request):
+            return stream_list(users, UserSerializer, selection=selection)
+
+        return Response(serialize_values(users, UserSerializer, selection))
 
     def create(self, request):
         """Handle POST operations
@@ -45,6 +70,7 @@ class UserView(ViewSet):
                 uid=user,
                 bio=request.data["bio"],
             )
+            invalidate(user.id)
             serializer = UserSerializer(user)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except User.DoesNotExist:
@@ -52,6 +78,7 @@ class UserView(ViewSet):
         except Exception as ex:
             return Response({'message': str(ex)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @if_match(User, owner_field='id')
     def update(self, request, pk):
         """Handle PUT requests for an User
 
@@ -67,6 +94,7 @@ class UserView(ViewSet):
             serializer = UserSerializer(user, data=request.data)
             if serializer.is_valid():
                 serializer.save()
+                invalidate(user.id)
                 return Response(serializer.data, status=status.HTTP_200_OK)
             else:
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -75,6 +103,7 @@ class UserView(ViewSet):
         except Exception as ex:
             return Response({'message': str(ex)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @if_match(User, owner_field='id')
     def destroy(self, request, pk):
         """Handle DELETE requests for a user
 
@@ -84,6 +113,7 @@ class UserView(ViewSet):
         try:
             user = User.objects.get(pk=pk)
             user.delete()
+            invalidate(pk)
             return Response(None, status=status.HTTP_204_NO_CONTENT)
         except User.DoesNotExist:
             return Response({'message': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -91,7 +121,7 @@ class UserView(ViewSet):
             return Response({'message': str(ex)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(FieldsMixin, serializers.ModelSerializer):
     """JSON serializer for Users"""
 
     class Meta:
@@ -3,3 +3,15 @@ from .test_group import TestGroups
 from .test_individual import TestIndividuals
 from .test_story import TestStorys
 from .test_user import TestUsers
+from .test_individualstory import TestIndividualStorys
+from .test_groupstory import TestGroupStorys
+from .test_fastpath import TestFastPath
+from .test_asgi import TestAsgi
+from .test_batch import TestBatch
+from .test_database import TestDatabase
+from .test_router import TestReplicaRouter
+from .test_search import TestSearch
+from .test_metrics import TestMetrics
+from .test_slowqueries import TestSlowQueries
+from .test_renderers import TestRenderers
+from .test_compression import TestCompression
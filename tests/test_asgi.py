@@ -0,0 +1,33 @@
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from rest_framework.test import APITestCase
+from faker import Faker
+from lwl.asgi import application
+from .utils import create_data, refresh_data
+
+
+class TestAsgi(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faker = Faker()
+        create_data(cls)
+
+    def setUp(self):
+        refresh_data(self)
+
+    async def test_streamed_list(self):
+        expected = await sync_to_async(self.client.get)("/storys")
+        response = await sync_to_async(self.client.get)("/storys?stream=true")
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        await application.send_response(response, send)
+
+        self.assertEqual(messages[0]["status"], status.HTTP_200_OK)
+        self.assertIn((b"Content-Type", b"application/json"), messages[0]["headers"])
+        self.assertEqual(b"".join(message.get("body", b"") for message in messages[1:]),
+                         expected.content)
+        self.assertNotIn("more_body", messages[-1])
@@ -0,0 +1,91 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+from faker import Faker
+from lwlapi.models import IndividualStory, Story
+from .utils import create_data, refresh_data
+
+
+class TestBatch(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faker = Faker()
+        create_data(cls)
+
+    def setUp(self):
+        refresh_data(self)
+
+    def test_batch(self):
+        story = self.storys[0]
+        individual = self.individuals[0]
+        IndividualStory.objects.filter(story=story, individual=individual).delete()
+
+        response = self.client.post("/batch", {"requests": [
+            {"method": "POST", "path": f"/storys/{story.id}/add_individual_to_story",
+             "body": {"individualIds": [individual.id]}},
+            {"method": "GET", "path": f"/individualstorys/individuals_by_stories?story_id={story.id}"},
+            {"method": "GET", "path": f"/storys/{story.id}"},
+            {"method": "GET", "path": "/storys/0"},
+            {"method": "GET", "path": "/batch"},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        responses = response.data["responses"]
+        self.assertEqual([sub["status"] for sub in responses], [200, 200, 200, 404, 404])
+        self.assertEqual(responses[0]["body"]["added_individuals"], [individual.id])
+        self.assertIn(individual.id, [link["individual"]["id"] for link in responses[1]["body"]])
+        self.assertEqual(responses[2]["body"]["id"], story.id)
+        self.assertIn("ETag", responses[2]["headers"])
+
+    def test_batch_atomic(self):
+        story = self.storys[0]
+
+        response = self.client.post("/batch", {"atomic": True, "requests": [
+            {"method": "DELETE", "path": f"/storys/{story.id}"},
+            {"method": "GET", "path": "/storys/0"},
+            {"method": "GET", "path": "/storys"},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(response.data["committed"])
+        self.assertEqual([sub["status"] for sub in response.data["responses"]], [204, 404])
+        self.assertTrue(Story.objects.filter(pk=story.id).exists())
+
+    def test_batch_atomic_rollback_keeps_cache(self):
+        story = self.storys[0]
+        url = f"/storys?uid={story.uid_id}"
+        etag = self.client.get(url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.client.post("/batch", {"atomic": True, "requests": [
+                {"method": "DELETE", "path": f"/storys/{story.id}"},
+                {"method": "GET", "path": url},
+                {"method": "GET", "path": "/storys/0"},
+            ]}, format='json')
+
+        self.assertFalse(response.data["committed"])
+        listed = response.data["responses"][1]
+        self.assertNotIn(story.id, [row["id"] for row in listed["body"]])
+        self.assertNotIn("ETag", listed["headers"])
+        self.assertNotIn("X-Cache", listed["headers"])
+        self.assertEqual(callbacks, [])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(url)
+        self.assertIn(story.id, [row["id"] for row in response.data])
+
+    def test_batch_atomic_commit_invalidates(self):
+        story = self.storys[0]
+        url = f"/storys?uid={story.uid_id}"
+        etag = self.client.get(url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/batch", {"atomic": True, "requests": [
+                {"method": "DELETE", "path": f"/storys/{story.id}"},
+            ]}, format='json')
+
+        self.assertTrue(response.data["committed"])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn(story.id, [row["id"] for row in response.data])
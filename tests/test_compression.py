@@ -0,0 +1,109 @@
+import gzip
+import unittest
+import zlib
+from unittest import mock
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+from faker import Faker
+from lwlapi import compression
+from lwlapi.models import Story
+from .utils import create_data, refresh_data
+
+
+class TestCompression(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faker = Faker()
+        create_data(cls)
+        Story.objects.bulk_create(
+            Story(name=f"story {i}", uid=cls.users[0], description="description " * 10, type="white")
+            for i in range(20))
+
+    def setUp(self):
+        refresh_data(self)
+
+    def test_gzip(self):
+        plain = self.client.get("/storys")
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", plain["Vary"])
+
+        response = self.client.get("/storys", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertLess(len(response.content), len(plain.content) / 3)
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_small_responses_not_compressed(self):
+        response = self.client.get(f"/storys/{self.storys[0].id}", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_choose(self):
+        encodings = {"zstd": None, "br": None, "gzip": None}
+        with mock.patch.dict(compression.ENCODINGS, encodings, clear=True):
+            self.assertEqual(compression.choose("gzip, deflate, br, zstd"), "zstd")
+            self.assertEqual(compression.choose("gzip, br;q=0.8, zstd;q=0.5"), "gzip")
+            self.assertEqual(compression.choose("gzip;q=0, BR"), "br")
+            self.assertEqual(compression.choose("*"), "zstd")
+            self.assertEqual(compression.choose("*, zstd;q=0"), "br")
+            self.assertIsNone(compression.choose("identity"))
+            self.assertIsNone(compression.choose(""))
+        with mock.patch.dict(compression.ENCODINGS, {"gzip": None}, clear=True):
+            self.assertEqual(compression.choose("br, zstd, gzip;q=0.1"), "gzip")
+            self.assertIsNone(compression.choose("br, zstd"))
+
+    def test_streamed(self):
+        plain = b"".join(self.client.get("/storys?stream=true").streaming_content)
+        response = self.client.get("/storys?stream=true", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), plain)
+
+        # Every chunk can be decoded as soon as it arrives
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        for chunk, piece in zip([b"[1,", b"2,", b"3]"],
+                                compression.compress_stream(iter([b"[1,", b"2,", b"3]"]), "gzip")):
+            self.assertEqual(decompressor.decompress(piece), chunk)
+
+    def test_conditional_get(self):
+        response = self.client.get("/storys", HTTP_ACCEPT_ENCODING="gzip")
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+
+        response = self.client.get("/storys", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get("/storys", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_match_needs_strong_etag(self):
+        story = self.storys[0]
+        etag = self.client.get(f"/storys/{story.id}")["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+
+        response = self.client.delete(f"/storys/{story.id}", HTTP_IF_MATCH=f"W/{etag}")
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertTrue(Story.objects.filter(pk=story.id).exists())
+
+        response = self.client.delete(f"/storys/{story.id}", HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    @unittest.skipIf(compression.brotli is None, "brotli is not installed")
+    def test_brotli(self):
+        plain = self.client.get("/storys")
+        response = self.client.get("/storys", HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(compression.brotli.decompress(response.content), plain.content)
+
+    @unittest.skipIf(compression.zstandard is None, "zstandard is not installed")
+    def test_zstd(self):
+        plain = b"".join(self.client.get("/storys?stream=true").streaming_content)
+        response = self.client.get("/storys?stream=true", HTTP_ACCEPT_ENCODING="gzip, br, zstd")
+        self.assertEqual(response["Content-Encoding"], "zstd")
+        body = b"".join(response.streaming_content)
+        reader = compression.zstandard.ZstdDecompressor().decompressobj()
+        self.assertEqual(reader.decompress(body), plain)
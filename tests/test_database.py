@@ -0,0 +1,31 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+
+class TestDatabase(TestCase):
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite profile')
+    def test_sqlite_pragmas(self):
+        pragmas = connection.settings_dict['OPTIONS']['pragmas']
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], pragmas['busy_timeout'])
+            cursor.execute("PRAGMA cache_size")
+            self.assertEqual(cursor.fetchone()[0], pragmas['cache_size'])
+
+    @skipUnless(connection.vendor == 'postgresql', 'PostgreSQL pool')
+    def test_postgresql_pool_reuses_connections(self):
+        from django.db.utils import ConnectionHandler
+
+        # A second handler gets its own DatabaseWrapper, like another thread
+        other = ConnectionHandler({'default': connection.settings_dict})['default']
+        other.ensure_connection()
+        backend_pid = other.connection.get_backend_pid()
+        other.close()
+
+        again = ConnectionHandler({'default': connection.settings_dict})['default']
+        again.ensure_connection()
+        self.assertEqual(again.connection.get_backend_pid(), backend_pid)
+        again.close()
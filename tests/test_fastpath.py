@@ -0,0 +1,39 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from faker import Faker
+from lwlapi.fastpath import serialize_values, supports_fast_path
+from lwlapi.models import Group, Individual, Story, User
+from lwlapi.views import GroupSerializer, IndividualSerializer, StorySerializer, UserSerializer
+from lwlapi.views.individualstory import IndividualStorySerializer
+from .utils import create_data, refresh_data
+
+
+class TestFastPath(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faker = Faker()
+        create_data(cls)
+        user = User.objects.create(
+            name="Zoë  ", bio="", uid="\"quoted\" \\ uid")
+        Story.objects.create(
+            name="é中\U0001F600", uid=user, description="line\u2028break", type="</script>")
+
+    def setUp(self):
+        refresh_data(self)
+
+    def test_matches_model_serializer(self):
+        renderer = JSONRenderer()
+        for model, serializer_class in ((Story, StorySerializer),
+                                        (Individual, IndividualSerializer),
+                                        (Group, GroupSerializer),
+                                        (User, UserSerializer)):
+            queryset = model.objects.order_by('id')
+
+            self.assertTrue(supports_fast_path(serializer_class))
+            self.assertEqual(
+                renderer.render(serialize_values(queryset, serializer_class)),
+                renderer.render(serializer_class(queryset, many=True).data))
+
+    def test_nested_serializer_falls_back(self):
+        self.assertFalse(supports_fast_path(IndividualStorySerializer))
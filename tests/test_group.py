@@ -2,10 +2,16 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 from faker import Faker
 from lwlapi.models import Group, User
-from .utils import create_data, refresh_data
+from .utils import QueryBudgetMixin, create_data, refresh_data
 
 
-class TestGroups(APITestCase):
+class TestGroups(QueryBudgetMixin, APITestCase):
+    query_budgets = {
+        'GroupView.list': 1,
+        'GroupView.retrieve': 1,
+        'GroupView.update': 4,
+        'GroupView.destroy': 3,
+    }
 
     @classmethod
     def setUpTestData(cls):
@@ -13,6 +19,7 @@ class TestGroups(APITestCase):
         create_data(cls)
 
     def setUp(self):
+        super().setUp()
         refresh_data(self)
 
     def test_create(self):
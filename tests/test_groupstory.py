@@ -0,0 +1,53 @@
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.test import APITestCase
+from faker import Faker
+from lwlapi.models import GroupStory
+from .utils import QueryBudgetMixin, create_data, link_rows, refresh_data
+
+
+class TestGroupStorys(QueryBudgetMixin, APITestCase):
+    query_budgets = {
+        'GroupStoryView.list': 1,
+        'GroupStoryView.stories_by_group': 2,
+        'GroupStoryView.groups_by_stories': 2,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faker = Faker()
+        create_data(cls)
+
+    def setUp(self):
+        super().setUp()
+        refresh_data(self)
+
+    def test_query_count_is_flat(self):
+        """The query_budgets hold however many rows are linked"""
+        for count in (10, 10000):
+            story, group = link_rows(GroupStory, "group", self.users[0], count)
+            for url in (
+                "/groupstorys",
+                f"/groupstorys/groups_by_stories?story_id={story.id}",
+                f"/groupstorys/stories_by_group?group_id={group.id}",
+            ):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_duplicate_link_rejected(self):
+        link = self.group_storys[0]
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            GroupStory.objects.create(group=link.group, story=link.story)
+
+    def test_list(self):
+        response = self.client.get("/groupstorys")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), len(self.group_storys))
+
+        first_group_story = response.data[0]
+
+        self.assertTrue("id" in first_group_story)
+        self.assertTrue("name" in first_group_story["group"])
+        self.assertTrue("name" in first_group_story["story"])
@@ -2,10 +2,16 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 from faker import Faker
 from lwlapi.models import Individual, User
-from .utils import create_data, refresh_data
+from .utils import QueryBudgetMixin, create_data, refresh_data
 
 
-class TestIndividuals(APITestCase):
+class TestIndividuals(QueryBudgetMixin, APITestCase):
+    query_budgets = {
+        'IndividualView.list': 1,
+        'IndividualView.retrieve': 1,
+        'IndividualView.update': 4,
+        'IndividualView.destroy': 3,
+    }
 
     @classmethod
     def setUpTestData(cls):
@@ -13,6 +19,7 @@ class TestIndividuals(APITestCase):
         create_data(cls)
 
     def setUp(self):
+        super().setUp()
         refresh_data(self)
 
     def test_create(self):
@@ -0,0 +1,72 @@
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from faker import Faker
+from lwlapi.models import IndividualStory
+from .utils import QueryBudgetMixin, create_data, link_rows, refresh_data
+
+
+class TestIndividualStorys(QueryBudgetMixin, APITestCase):
+    query_budgets = {
+        'IndividualStoryView.list': 1,
+        'IndividualStoryView.stories_by_individual': 2,
+        'IndividualStoryView.individuals_by_stories': 2,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faker = Faker()
+        create_data(cls)
+
+    def setUp(self):
+        super().setUp()
+        refresh_data(self)
+
+    def test_query_count_is_flat(self):
+        """The query_budgets hold however many rows are linked"""
+        for count in (10, 10000):
+            story, individual = link_rows(IndividualStory, "individual", self.users[0], count)
+            for url in (
+                "/individualstorys",
+                f"/individualstorys/individuals_by_stories?story_id={story.id}",
+                f"/individualstorys/stories_by_individual?individual_id={individual.id}",
+            ):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_duplicate_link_rejected(self):
+        link = self.individual_storys[0]
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            IndividualStory.objects.create(individual=link.individual, story=link.story)
+
+    def test_list(self):
+        response = self.client.get("/individualstorys")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), len(self.individual_storys))
+
+        first_individual_story = response.data[0]
+
+        self.assertTrue("id" in first_individual_story)
+        self.assertTrue("name" in first_individual_story["individual"])
+        self.assertTrue("name" in first_individual_story["story"])
+
+    def test_list_fields(self):
+        link = min(self.individual_storys, key=lambda link: link.id)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/individualstorys?fields=id,story.name,story.id")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0], {
+            "id": link.id, "story": {"id": link.story.id, "name": link.story.name}})
+        self.assertNotIn("lwlapi_individual", queries[0]["sql"].replace("lwlapi_individualstory", ""))
+        self.assertNotIn('"description"', queries[0]["sql"])
+
+        response = self.client.get(f"/individualstorys/{link.id}?fields=individual")
+        self.assertEqual(list(response.data), ["individual"])
+        self.assertEqual(response.data["individual"]["name"], link.individual.name)
+
+        response = self.client.get("/individualstorys?fields=story.nope")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from faker import Faker
+from lwlapi import metrics
+from .utils import create_data, refresh_data
+
+
+class TestMetrics(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faker = Faker()
+        create_data(cls)
+
+    def setUp(self):
+        refresh_data(self)
+        metrics.reset()
+
+    def scrape(self):
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        return response.content.decode().splitlines()
+
+    def test_metrics(self):
+        story = self.storys[0]
+        self.client.get("/storys")
+        self.client.get(f"/storys/{story.id}")
+        self.client.get(f"/storys/{story.id}")
+        self.client.get("/storys/0")
+        self.client.get("/no/such/path")
+        body = self.client.get("/storys?stream=true")
+        content = b"".join(body.streaming_content)
+
+        lines = self.scrape()
+        self.assertIn('lwl_http_requests_total{view="StoryView.retrieve",method="GET",status="200"} 2', lines)
+        self.assertIn('lwl_http_requests_total{view="StoryView.retrieve",method="GET",status="404"} 1', lines)
+        self.assertIn('lwl_http_requests_total{view="unresolved",method="GET",status="404"} 1', lines)
+        self.assertIn('lwl_http_request_errors_total{view="StoryView.retrieve"} 0', lines)
+        self.assertIn('lwl_http_request_duration_seconds_bucket{view="StoryView.retrieve",le="+Inf"} 3', lines)
+        self.assertIn('lwl_http_request_duration_seconds_count{view="StoryView.list"} 2', lines)
+        # The streamed list's size is counted once it has been read
+        self.assertIn('lwl_http_response_size_bytes_count{view="StoryView.list"} 2', lines)
+        self.assertIn(f'lwl_http_response_size_bytes_sum{{view="StoryView.list"}} {2 * len(content)}', lines)
+
+    def test_exited_threads_retired(self):
+        def record():
+            metrics.record("StoryView.list", "GET", 200, 0.001, 10)
+
+        for _ in range(20):
+            thread = threading.Thread(target=record)
+            thread.start()
+            thread.join()
+        record()
+
+        self.assertLessEqual(len(metrics._shards), 2)
+        totals = metrics.snapshot()
+        self.assertEqual(totals.requests[("StoryView.list", "GET", 200)], 21)
+        self.assertEqual(totals.sizes["StoryView.list"][-1], 210)
+
+    def test_metrics_shared_directory(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(LWL_METRICS_DIR=directory):
+            # Another worker's last flush
+            other = {
+                "requests": [["StoryView.list", "GET", 200, 5], ["StoryView.list", "GET", 500, 1]],
+                "latency": {"StoryView.list": [6] + [0] * 11 + [0.01]},
+                "sizes": {},
+            }
+            Path(directory, "1.json").write_text(json.dumps(other))
+            self.client.get("/storys")
+
+            lines = self.scrape()
+            self.assertTrue(Path(directory, f"{os.getpid()}.json").exists())
+
+        self.assertIn('lwl_http_requests_total{view="StoryView.list",method="GET",status="200"} 6', lines)
+        self.assertIn('lwl_http_request_errors_total{view="StoryView.list"} 1', lines)
+        self.assertIn('lwl_http_request_duration_seconds_count{view="StoryView.list"} 7', lines)
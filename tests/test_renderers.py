@@ -0,0 +1,92 @@
+import datetime
+import io
+import json
+import unittest
+from decimal import Decimal
+
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from faker import Faker
+from lwlapi.models import Story
+from lwlapi.parsers import ORJSONParser
+from lwlapi.renderers import ORJSONRenderer, msgpack
+from .utils import create_data, refresh_data
+
+
+class TestRenderers(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faker = Faker()
+        create_data(cls)
+
+    def setUp(self):
+        refresh_data(self)
+
+    def test_json_output_unchanged(self):
+        data = {
+            "text": "café \u2028 \u2029 \"quoted\" \U0001F600",
+            "numbers": [0, -1, 2 ** 63 - 1, 1.5, Decimal("1.10")],
+            "big": 2 ** 70,
+            "when": datetime.datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+            "day": datetime.date(2024, 1, 2),
+            "lazy": gettext_lazy("Not found."),
+            "errors": {"name": [ErrorDetail("This field is required.", code="required")]},
+            1: None,
+        }
+        for renderer_context in ({}, {"indent": 4}):
+            self.assertEqual(ORJSONRenderer().render(data, None, renderer_context),
+                             JSONRenderer().render(data, None, renderer_context))
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+        for url in ("/storys", f"/storys/{self.storys[0].id}/graph", "/individualstorys",
+                    "/storys/0"):
+            response = self.client.get(url)
+            self.assertEqual(response.content, JSONRenderer().render(response.data), url)
+
+    def test_json_parser(self):
+        body = json.dumps({"name": "café", "ids": [1, 2 ** 70]}).encode()
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(body)),
+                         JSONParser().parse(io.BytesIO(body)))
+        latin = "café".encode("latin-1")
+        self.assertEqual(
+            ORJSONParser().parse(io.BytesIO(b'"' + latin + b'"'), None, {"encoding": "latin-1"}),
+            "café")
+
+        for body in (b"{", b"[NaN]"):
+            with self.assertRaises(ParseError) as expected:
+                JSONParser().parse(io.BytesIO(body))
+            with self.assertRaises(ParseError) as parsed:
+                ORJSONParser().parse(io.BytesIO(body))
+            self.assertEqual(str(parsed.exception), str(expected.exception))
+
+        response = self.client.post("/storys/bulk", b"[{", content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @unittest.skipIf(msgpack is None, "msgpack is not installed")
+    def test_msgpack(self):
+        response = self.client.get("/storys", HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content),
+                         json.loads(self.client.get("/storys").content))
+        self.assertEqual(self.client.get("/storys?format=msgpack")["Content-Type"],
+                         "application/msgpack")
+
+        user = self.users[0]
+        items = [{"name": f"story {i}", "uid": user.uid, "description": "packed", "type": "white",
+                  "external_id": f"msgpack-{i}"} for i in range(3)]
+        response = self.client.post("/storys/bulk", msgpack.packb(items),
+                                    content_type="application/msgpack",
+                                    HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        results = msgpack.unpackb(response.content)["results"]
+        self.assertEqual([result["status"] for result in results], ["created"] * 3)
+        self.assertEqual(Story.objects.filter(external_id__startswith="msgpack-").count(), 3)
+
+        response = self.client.post("/storys/bulk", b"\xc1", content_type="application/msgpack")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
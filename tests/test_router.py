@@ -0,0 +1,88 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import router
+from django.test import RequestFactory
+from rest_framework import status
+from rest_framework.test import APITestCase
+from faker import Faker
+from lwlapi.caching import primary_if_written
+from lwlapi.middleware import PRIMARY_COOKIE, PRIMARY_HEADER, _start
+from lwlapi.models import Story
+from lwlapi.routers import on_primary, use_replica
+from .utils import create_data, refresh_data
+
+
+@mock.patch('lwlapi.routers.replicas', return_value=['replica_0'])
+@mock.patch('lwlapi.caching.replicas', return_value=['replica_0'])
+class TestReplicaRouter(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faker = Faker()
+        create_data(cls)
+
+    def setUp(self):
+        refresh_data(self)
+        cache.clear()
+
+    def test_reads_go_to_replica_only_when_marked(self, *_):
+        self.assertEqual(Story.objects.all().db, 'default')
+
+        token = use_replica.set(True)
+        try:
+            self.assertEqual(Story.objects.all().db, 'replica_0')
+            with on_primary():
+                self.assertEqual(Story.objects.all().db, 'default')
+            self.assertEqual(Story.objects.all().db, 'replica_0')
+            self.assertEqual(router.db_for_write(Story), 'default')
+        finally:
+            use_replica.reset(token)
+
+    def test_middleware_marks_safe_requests(self, *_):
+        factory = RequestFactory()
+        for request, expected in (
+            (factory.get('/storys'), True),
+            (factory.post('/storys'), False),
+            (factory.get('/storys', HTTP_X_PRIMARY_UNTIL=str(time.time() + 60)), False),
+            (factory.get('/storys', HTTP_X_PRIMARY_UNTIL=str(time.time() - 60)), True),
+        ):
+            token = _start(request)
+            self.assertIs(use_replica.get(), expected, request)
+            use_replica.reset(token)
+
+    def test_write_pins_client_to_primary(self, *_):
+        story = self.storys[0]
+        response = self.client.put(f"/storys/{story.id}", {
+            "name": "Renamed",
+            "description": story.description,
+            "type": story.type,
+            "uid": story.uid_id,
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreater(float(response[PRIMARY_HEADER]), time.time())
+        self.assertEqual(response.cookies[PRIMARY_COOKIE].value, response[PRIMARY_HEADER])
+
+        response = self.client.get(f"/storys/{story.id}")
+        self.assertNotIn(PRIMARY_HEADER, response)
+
+    def test_recent_write_reads_from_primary(self, *_):
+        story = self.storys[0]
+        other = next(s for s in self.storys if s.uid_id != story.uid_id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(f"/storys/{story.id}", {
+                "name": "Renamed",
+                "description": story.description,
+                "type": story.type,
+                "uid": story.uid_id,
+            }, format="json")
+
+        token = use_replica.set(True)
+        try:
+            with primary_if_written(story.uid_id):
+                self.assertEqual(Story.objects.all().db, 'default')
+            with primary_if_written(other.uid_id):
+                self.assertEqual(Story.objects.all().db, 'replica_0')
+        finally:
+            use_replica.reset(token)
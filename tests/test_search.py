@@ -0,0 +1,72 @@
+from io import StringIO
+
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+from faker import Faker
+from lwlapi.models import Group, Story
+from .utils import QueryBudgetMixin, create_data, refresh_data
+
+
+class TestSearch(QueryBudgetMixin, APITestCase):
+    query_budgets = {
+        # One full-text query plus one to load the matches, per model
+        'search': 6,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faker = Faker()
+        create_data(cls)
+
+    def setUp(self):
+        super().setUp()
+        refresh_data(self)
+
+    def search(self, query, **params):
+        response = self.client.get("/search", {"q": query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(row["model"], row["id"]) for row in response.data["results"]]
+
+    def test_search(self):
+        user, other = self.users[0], self.users[1]
+        titled = Story.objects.create(name="Shipwreck off Lisbon", uid=user,
+                                      description="A storm", type="saga")
+        described = Story.objects.create(name="Harbour", uid=user,
+                                         description="The shipwrecks of Lisbon", type="saga")
+        elsewhere = Story.objects.create(name="Lisbon shipwreck", uid=other,
+                                         description="", type="saga")
+        group = Group.objects.create(name="Crew", uid=user,
+                                     description="Survived a shipwreck near Lisbon", type="crew")
+
+        # Stemmed, and name matches rank above description matches
+        self.assertEqual(self.search("lisbon shipwreck", uid=user.id), [
+            ("story", titled.id), ("story", described.id), ("group", group.id)])
+        self.assertEqual(self.search("lisbon shipwreck", uid=user.id, model="story"), [
+            ("story", titled.id), ("story", described.id)])
+        self.assertIn(("story", elsewhere.id), self.search("lisb"))
+        self.assertEqual(self.search("\"shipwreck\" (lisbon*", uid=other.id),
+                         [("story", elsewhere.id)])
+
+        titled.name = "Calm seas"
+        titled.save()
+        described.delete()
+        self.assertEqual(self.search("lisbon shipwreck", uid=user.id), [("group", group.id)])
+        self.assertEqual(self.search("calm", uid=user.id), [("story", titled.id)])
+        Story.objects.filter(uid=user).update(description="")
+        self.assertEqual(self.search("shipwreck", uid=user.id, model="story"), [])
+
+    def test_search_invalid(self):
+        for params in ({}, {"q": "!!"}, {"q": "a", "model": "user"},
+                       {"q": "a", "uid": "x"}, {"q": "a", "limit": 0}):
+            response = self.client.get("/search", params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_rebuild_search_index(self):
+        story = self.storys[0]
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+
+        self.assertIn(f"story: {Story.objects.count()} rows", out.getvalue())
+        self.assertIn(("story", story.id),
+                      self.search(story.name, uid=story.uid_id, model="story"))
@@ -0,0 +1,89 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from faker import Faker
+from lwlapi import instrumentation
+from .utils import create_data, refresh_data
+
+
+@override_settings(LWL_RESPONSE_CACHE=False)
+class TestSlowQueries(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faker = Faker()
+        create_data(cls)
+
+    def setUp(self):
+        refresh_data(self)
+
+    def test_slow_query_logged(self):
+        story = self.storys[0]
+        with override_settings(LWL_SLOW_QUERY_MS=0.000001), \
+                self.assertLogs("lwlapi.slow_queries", "WARNING") as logs:
+            response = self.client.get(f"/storys/{story.id}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        entries = [json.loads(record.getMessage()) for record in logs.records]
+        selects = [entry for entry in entries if 'FROM "lwlapi_story"' in entry["sql"]]
+        self.assertTrue(selects)
+        entry = selects[0]
+        self.assertEqual(entry["view"], "StoryView.retrieve")
+        self.assertEqual(entry["method"], "GET")
+        self.assertEqual(entry["path"], f"/storys/{story.id}")
+        self.assertEqual(entry["database"], "default")
+        self.assertIn(story.id, entry["params"])
+        self.assertGreater(entry["duration_ms"], 0)
+        self.assertTrue(entry["plan"])
+        self.assertTrue(any("lwlapi_story" in line for line in entry["plan"]))
+
+    def test_threshold(self):
+        with mock.patch.object(instrumentation.slow_query_logger, "warning") as warning:
+            with override_settings(LWL_SLOW_QUERY_MS=0):
+                self.client.get("/storys")
+            with override_settings(LWL_SLOW_QUERY_MS=60_000):
+                self.client.get("/storys")
+        warning.assert_not_called()
+
+    def test_summary(self):
+        def entry(sql, duration, view):
+            return json.dumps({"time": "2026-01-01T00:00:00.000+00:00", "duration_ms": duration,
+                               "database": "default", "view": view, "method": "GET",
+                               "path": "/", "sql": sql, "params": [1], "plan": ["SCAN t"]})
+
+        with tempfile.TemporaryDirectory() as directory:
+            log = Path(directory) / "slow.log"
+            Path(f"{log}.1").write_text(
+                entry('SELECT * FROM "t" WHERE "id" IN (%s, %s)', 300, "StoryView.list") + "\n")
+            log.write_text("\n".join([
+                entry('SELECT * FROM "t" WHERE "id" IN (%s, %s, %s)', 250, "GroupView.list"),
+                entry('SELECT * FROM "u"', 400, "UserView.list"),
+                "not json",
+            ]) + "\n")
+            out = StringIO()
+            call_command("slow_queries", "--log", str(log), stdout=out, no_color=True)
+            by_max = StringIO()
+            call_command("slow_queries", "--log", str(log), "--sort", "max", "--limit", "1",
+                         stdout=by_max, no_color=True)
+
+        output = out.getvalue()
+        self.assertIn("2 slow statements", output)
+        first, second = output.index('"t" WHERE "id" IN (%s, ...)'), output.index('FROM "u"')
+        self.assertLess(first, second)
+        self.assertIn("2 x, total 550.0 ms, mean 275.0 ms, max 300.0 ms", output)
+        self.assertIn("views: StoryView.list (1), GroupView.list (1)", output)
+        self.assertIn("SCAN t", output)
+        self.assertIn('FROM "u"', by_max.getvalue())
+        self.assertNotIn('FROM "t"', by_max.getvalue())
+
+    @override_settings(LWL_SLOW_QUERY_LOG=None)
+    def test_summary_without_log(self):
+        with self.assertRaises(CommandError):
+            call_command("slow_queries", stdout=StringIO(), no_color=True)
@@ -1,11 +1,29 @@
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APITestCase
 from faker import Faker
-from lwlapi.models import Story, User
-from .utils import create_data, refresh_data
+from lwlapi import caching
+from lwlapi.models import GroupStory, Individual, IndividualStory, Story, User
+from lwlapi.streaming import stream_list
+from lwlapi.views.story import StorySerializer
+from .utils import QueryBudgetMixin, create_data, refresh_data
 
 
-class TestStorys(APITestCase):
+class TestStorys(QueryBudgetMixin, APITestCase):
+    query_budgets = {
+        'StoryView.list': 1,
+        'StoryView.retrieve': 1,
+        'StoryView.create': 5,
+        'StoryView.bulk': 5,
+        'StoryView.update': 5,
+        'StoryView.destroy': 4,
+        'StoryView.graph': 3,
+        'StoryView.add_individual_to_story': 6,
+    }
 
     @classmethod
     def setUpTestData(cls):
@@ -13,6 +31,7 @@ class TestStorys(APITestCase):
         create_data(cls)
 
     def setUp(self):
+        super().setUp()
         refresh_data(self)
 
     def test_create(self):
@@ -45,6 +64,53 @@ class TestStorys(APITestCase):
         self.assertEqual(db_story.description, new_story["description"])
         self.assertEqual(db_story.type, new_story["type"])
 
+    def test_bulk_upsert(self):
+        user = self.users[0]
+        items = [{
+            "name": self.faker.name(),
+            "uid": user.uid,
+            "description": self.faker.sentence(nb_words=3),
+            "type": "white",
+            "external_id": f"import-{i}",
+        } for i in range(20)]
+
+        with self.assertNumQueries(5):
+            response = self.client.post("/storys/bulk", items, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        results = response.data["results"]
+        self.assertEqual([result["status"] for result in results], ["created"] * 20)
+        self.assertEqual(Story.objects.filter(uid=user, external_id__startswith="import-").count(), 20)
+
+        items[0]["name"] = "renamed"
+        response = self.client.post("/storys", items, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["results"][0]["status"], "updated")
+        self.assertEqual(response.data["results"][0]["id"], results[0]["id"])
+        self.assertEqual(Story.objects.get(pk=results[0]["id"]).name, "renamed")
+        self.assertEqual(Story.objects.filter(uid=user, external_id__startswith="import-").count(), 20)
+
+    def test_bulk_invalid(self):
+        count = Story.objects.count()
+        items = [
+            {"name": "ok", "uid": self.users[0].uid, "description": "", "type": "white"},
+            {"name": "x" * 101, "uid": "missing", "description": "d", "type": "white"},
+            {"name": "no type", "uid": self.users[0].uid, "description": "d"},
+        ]
+
+        response = self.client.post("/storys/bulk", items, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        results = response.data["results"]
+        self.assertEqual(results[0]["status"], "valid")
+        self.assertEqual(sorted(results[1]["errors"]), ["name", "uid"])
+        self.assertEqual(list(results[2]["errors"]), ["type"])
+        self.assertEqual(Story.objects.count(), count)
+
+        response = self.client.post("/storys/bulk", items[:1], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
     def test_delete(self):
         story_id = Story.objects.all()[0].id
         response = self.client.delete(f"/storys/{story_id}")
@@ -105,6 +171,293 @@ class TestStorys(APITestCase):
         self.assertTrue("description" in first_story)
         self.assertTrue("type" in first_story)
 
+    def test_list_paginated(self):
+        seen = []
+        url = "/storys?limit=3"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            data = response.data
+            self.assertTrue("results" in data)
+            self.assertTrue("next" in data)
+            self.assertLessEqual(len(data["results"]), 3)
+
+            seen.extend(story["id"] for story in data["results"])
+            url = data["next"]
+
+        self.assertEqual(seen, sorted(story.id for story in self.storys))
+
+    def test_list_filtered(self):
+        user = self.users[0]
+        for name, type in (("Birthday alibi", "white"), ("Birds", "grey"),
+                           ("bird", "grey"), ("Cat", "white"), ("Alibi", "white")):
+            Story.objects.create(name=name, uid=user, description="", type=type)
+        base = f"/storys?uid={user.id}"
+
+        def names(query):
+            response = self.client.get(base + query)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, query)
+            return [story["name"] for story in response.data]
+
+        self.assertEqual(names("&name_prefix=Bir&ordering=name"), ["Birds", "Birthday alibi"])
+        self.assertEqual(names("&type=white&name_prefix=Bir"), ["Birthday alibi"])
+        self.assertEqual(names("&type=white&ordering=-name"), ["Cat", "Birthday alibi", "Alibi"])
+
+        ids = sorted(story.id for story in self.storys)
+        response = self.client.get(f"/storys?min_id={ids[2]}&max_id={ids[5]}&ordering=-id")
+        self.assertEqual([story["id"] for story in response.data], ids[5:1:-1])
+
+        response = self.client.get(base + "&ordering=name&limit=2")
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(response.data["results"][0]["name"],
+                         min(Story.objects.filter(uid=user).values_list("name", flat=True)))
+
+    def test_list_filter_invalid(self):
+        for query in ("ordering=name", "ordering=description", "uid=x", "min_id=1.5"):
+            response = self.client.get(f"/storys?{query}")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, query)
+
+    def test_list_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/storys?fields=name,id")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{"id": story.id, "name": story.name}
+                                         for story in sorted(self.storys, key=lambda s: s.id)])
+        self.assertNotIn('"description"', queries[0]["sql"])
+
+        response = self.client.get("/storys?fields=id,name&limit=3")
+        self.assertEqual([list(story) for story in response.data["results"]], [["id", "name"]] * 3)
+
+        response = self.client.get("/storys?fields=id,name&stream=true")
+        self.assertEqual(b"".join(response.streaming_content),
+                         self.client.get("/storys?fields=id,name").content)
+
+        self.query_budgets = dict(self.query_budgets, **{"StoryView.retrieve": 2})
+        story = self.storys[0]
+        response = self.client.get(f"/storys/{story.id}?fields=type,name")
+        self.assertEqual(response.data, {"name": story.name, "type": story.type})
+
+    def test_list_expand(self):
+        self.query_budgets = dict(self.query_budgets, **{"StoryView.list": 2, "StoryView.retrieve": 2})
+        story = self.storys[0]
+        user = story.uid
+
+        response = self.client.get(f"/storys?uid={user.id}&expand=uid")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]["uid"], {
+            "id": user.id, "name": user.name, "uid": user.uid, "bio": user.bio})
+        self.assertEqual(response["X-DB-Queries"], "2")
+
+        response = self.client.get("/storys?expand=uid&fields=id,uid.name&limit=2")
+        self.assertEqual(list(response.data["results"][0]), ["id", "uid"])
+        self.assertEqual(list(response.data["results"][0]["uid"]), ["name"])
+
+        response = self.client.get(f"/storys/{story.id}?expand=uid&fields=name,uid.id")
+        self.assertEqual(response.data, {"uid": {"id": user.id}, "name": story.name})
+        self.assertEqual(self.client.get(f"/storys/{story.id}?expand=uid&fields=name,uid.id",
+                                         HTTP_IF_NONE_MATCH=response["ETag"]).status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+
+    def test_fields_invalid(self):
+        for query in ("fields=nope", "fields=", "fields=uid.name", "expand=name",
+                      "expand=uid&fields=uid.nope", "fields=name.id"):
+            response = self.client.get(f"/storys?{query}")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, query)
+        response = self.client.get(f"/storys/{self.storys[0].id}?fields=nope")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_stats(self):
+        response = self.client.get(f"/storys?uid={self.storys[0].uid_id}")
+
+        self.assertEqual(response["X-DB-Queries"], "1")
+        self.assertIn("db;dur=", response["Server-Timing"])
+
+        self.query_budgets = {"StoryView.graph": 0}
+        with self.assertRaisesRegex(self.failureException, "StoryView.graph ran 3 queries"):
+            self.client.get(f"/storys/{self.storys[0].id}/graph")
+
+    def test_list_streamed(self):
+        response = self.client.get("/storys?stream=true")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b"".join(response.streaming_content),
+                         self.client.get("/storys").content)
+
+    def test_list_streamed_chunk_size(self):
+        stories = Story.objects.all()
+        count = stories.count()
+
+        parts = list(stream_list(stories, StorySerializer, chunk_size=2).streaming_content)
+
+        self.assertEqual(parts[0], b"[")
+        self.assertEqual([len(json.loads(b"[" + part.strip(b",]") + b"]")) for part in parts[1:]],
+                         [2] * (count // 2) + [count % 2])
+        self.assertEqual(json.loads(b"".join(parts)), json.loads(self.client.get("/storys").content))
+
+    def test_list_cached(self):
+        story = self.storys[0]
+        url = f"/storys?uid={story.uid.id}"
+
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "HIT")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/storys/{story.id}")
+
+        response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertNotIn(story.id, [data["id"] for data in response.data])
+        self.assertEqual(self.client.get("/cachestats").data,
+                         {"hits": 1, "misses": 2})
+
+    def test_list_cached_non_canonical_uid(self):
+        user = self.storys[0].uid
+        for url in (f"/storys?uid=0{user.id}", f"/storys?uid=%20{user.id}", f"/storys?uid=+{user.id}"):
+            self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/storys", {
+                "name": self.faker.name(), "uid": user.uid,
+                "description": "", "type": "white"}, format='json')
+        story_id = response.data["id"]
+
+        for url in (f"/storys?uid=0{user.id}", f"/storys?uid=%20{user.id}", f"/storys?uid=+{user.id}"):
+            response = self.client.get(url)
+            self.assertEqual(response["X-Cache"], "MISS", url)
+            self.assertIn(story_id, [data["id"] for data in response.data], url)
+
+        response = self.client.get("/storys?uid=one")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn("X-Cache", response)
+
+    def test_cache_invalidated_by_orm_writes(self):
+        story = self.storys[0]
+        url = f"/storys?uid={story.uid.id}"
+        etag = self.client.get(url)["ETag"]
+
+        story.name = self.faker.name()
+        with self.captureOnCommitCallbacks(execute=True):
+            story.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertIn(story.name, [data["name"] for data in response.data])
+
+    def test_retrieve_not_cached_across_write(self):
+        story = self.storys[0]
+        url = f"/storys/{story.id}"
+        read_at = caching.get_version(caching.ALL)
+        with self.captureOnCommitCallbacks(execute=True):
+            caching.invalidate(story.uid_id)
+
+        etag = caching.store_entry(
+            caching.retrieve_key(Story, url), story.uid_id, url, {}, read_at)
+
+        self.assertIsNone(etag)
+        self.assertIsNone(cache.get(caching.retrieve_key(Story, url)))
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+
+    def test_conditional_get(self):
+        story = self.storys[0]
+        etag = self.client.get(f"/storys/{story.id}")["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                f"/storys/{story.id}", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        list_etag = self.client.get("/storys")["ETag"]
+        response = self.client.get("/storys", HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/storys/{self.storys[1].id}")
+
+        response = self.client.get("/storys", HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], list_etag)
+
+    def test_if_match(self):
+        story = self.storys[0]
+        etag = self.client.get(f"/storys/{story.id}")["ETag"]
+        updated_story = {
+            "name": self.faker.name(),
+            "uid": story.uid.id,
+            "description": story.description,
+            "type": story.type
+        }
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                f"/storys/{story.id}", updated_story, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.delete(f"/storys/{story.id}", HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code,
+                         status.HTTP_412_PRECONDITION_FAILED)
+        self.assertTrue(Story.objects.filter(pk=story.id).exists())
+
+    def test_add_individual_to_story(self):
+        story = self.storys[0]
+        linked = Individual.objects.create(
+            name=self.faker.name(), uid=story.uid, description="", type="")
+        unlinked = Individual.objects.create(
+            name=self.faker.name(), uid=story.uid, description="", type="")
+        IndividualStory.objects.create(individual=linked, story=story)
+        missing_id = unlinked.id + 1000
+
+        response = self.client.post(
+            f"/storys/{story.id}/add_individual_to_story",
+            {"individualIds": [unlinked.id, linked.id, missing_id, unlinked.id]},
+            format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["added_individuals"], [unlinked.id])
+        self.assertEqual(response.data["existing_individuals"], [linked.id])
+        self.assertEqual(response.data["missing_individuals"], [missing_id])
+        self.assertEqual(IndividualStory.objects.filter(
+            story=story, individual=unlinked).count(), 1)
+
+    def test_add_individual_to_story_rejects_non_integer_ids(self):
+        story = self.storys[0]
+        individual = Individual.objects.create(
+            name=self.faker.name(), uid=story.uid, description="", type="")
+
+        for bad_id in (individual.id + 0.9, str(individual.id + 0.9), True, None):
+            response = self.client.post(
+                f"/storys/{story.id}/add_individual_to_story",
+                {"individualIds": [individual.id, bad_id]}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IndividualStory.objects.filter(story=story).exists())
+
+        response = self.client.post(
+            f"/storys/{story.id}/add_individual_to_story",
+            {"individualIds": [str(individual.id)]}, format='json')
+        self.assertEqual(response.data["added_individuals"], [individual.id])
+
+    def test_graph(self):
+        story = self.storys[-1]
+
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                f"/storys/{story.id}/graph?individuals_limit=1")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = response.data
+        self.assertEqual(data["id"], story.id)
+        self.assertEqual(len(data["individuals"]), 1)
+        self.assertEqual(
+            sorted(group["id"] for group in data["groups"]),
+            sorted(GroupStory.objects.filter(story=story).values_list("group_id", flat=True)))
+        self.assertTrue(Individual.objects.filter(
+            pk=data["individuals"][0]["id"], individual_storys__story=story).exists())
+
     def test_details(self):
         story = Story.objects.all()[0]
         response = self.client.get(f"/storys/{story.id}")
@@ -2,10 +2,18 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 from faker import Faker
 from lwlapi.models import User
-from .utils import create_data, refresh_data
+from .utils import QueryBudgetMixin, create_data, refresh_data
 
 
-class TestUsers(APITestCase):
+class TestUsers(QueryBudgetMixin, APITestCase):
+    query_budgets = {
+        'UserView.list': 1,
+        'UserView.update': 3,
+        # Full cascade: the user, 3 owned-row lookups, 4 link and 4 row deletes
+        'UserView.destroy': 12,
+        'register_user': 1,
+        'check_user': 1,
+    }
 
     @classmethod
     def setUpTestData(cls):
@@ -13,6 +21,7 @@ class TestUsers(APITestCase):
         create_data(cls)
 
     def setUp(self):
+        super().setUp()
         refresh_data(self)
 
     def test_create(self):
@@ -83,3 +92,25 @@ class TestUsers(APITestCase):
         self.assertTrue("name" in first_user)
         self.assertTrue("bio" in first_user)
         self.assertTrue("uid" in first_user)
+
+    def test_register_user_upsert(self):
+        registration = {"name": "First", "bio": "bio", "uid": "firebase-uid"}
+        with self.assertNumQueries(1):
+            response = self.client.post("/registeruser", registration, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user_id = response.data["id"]
+
+        registration["name"] = "Renamed"
+        response = self.client.post("/registeruser", registration, format='json')
+
+        self.assertEqual(response.data["id"], user_id)
+        self.assertEqual(User.objects.filter(uid="firebase-uid").count(), 1)
+        self.assertEqual(User.objects.get(pk=user_id).name, "Renamed")
+        response = self.client.post("/checkuser", {"uid": "firebase-uid"}, format='json')
+        self.assertEqual(response.data["id"], user_id)
+
+    def test_uid_unique(self):
+        response = self.client.put(f"/users/{self.users[1].id}", {
+            "name": "name", "bio": "bio", "uid": self.users[0].uid}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("uid", response.data)
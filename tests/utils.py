@@ -1,7 +1,11 @@
 import random
 
+from django.core.cache import cache
+from django.test import override_settings
 from faker import Faker
+from rest_framework.test import APIClient
 
+from lwlapi.instrumentation import view_label
 from lwlapi.models import Group, GroupStory, Individual, IndividualStory, Story, User
 
 
@@ -33,9 +37,9 @@ def create_data(cls):
 
     for _ in range(10):
         user = User.objects.create(
-            name=cls.faker.sentence(),
+            name=cls.faker.sentence()[:50],
             bio=cls.faker.sentence(),
-            uid=cls.faker.sentence()
+            uid=cls.faker.sentence()[:50]
         )
         cls.users.append(user)
 
@@ -89,7 +93,33 @@ def create_data(cls):
         cls.individual_storys.append(individual_story)
 
 
+def link_rows(link_model, field, user, count):
+    """Links `count` new rows of the model behind `field` to one new story and
+    `count` new stories to one new row of that model, returning the pair
+
+        story, group = link_rows(GroupStory, "group", user, 10000)
+    """
+    model = link_model._meta.get_field(field).related_model
+    story = Story.objects.create(
+        name="story", uid=user, description="", type="")
+    other = model.objects.create(
+        name=field, uid=user, description="", type="")
+
+    others = model.objects.bulk_create(
+        model(name=f"{field} {i}", uid=user, description="", type="")
+        for i in range(count))
+    stories = Story.objects.bulk_create(
+        Story(name=f"story {i}", uid=user, description="", type="")
+        for i in range(count))
+
+    link_model.objects.bulk_create(
+        [link_model(**{field: row, "story": story}) for row in others]
+        + [link_model(**{field: other, "story": row}) for row in stories])
+    return story, other
+
+
 def refresh_data(self):
+    cache.clear()
     for story in self.storys:
         story.refresh_from_db()
     for user in self.users:
@@ -102,3 +132,50 @@ def refresh_data(self):
         group_story.refresh_from_db()
     for individual_story in self.individual_storys:
         individual_story.refresh_from_db()
+
+
+class QueryBudgetClient(APIClient):
+    """APIClient that hands every response to its test's budget check"""
+    test = None
+
+    def request(self, **kwargs):
+        response = super().request(**kwargs)
+        if self.test is not None:
+            self.test.check_query_budget(response)
+        return response
+
+
+class QueryBudgetMixin:
+    """Fails a test when one of its requests runs more queries than the
+    view that served it is allowed
+
+        class TestStorys(QueryBudgetMixin, APITestCase):
+            query_budgets = {'StoryView.list': 1, 'StoryView.graph': 4}
+
+    Counts come from query_stats_middleware, so they include everything
+    the request ran. Views without a budget are not checked. Test classes
+    that define setUp() must call super().setUp().
+    """
+    client_class = QueryBudgetClient
+    query_budgets = {}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        stats_on = override_settings(LWL_QUERY_STATS=True)
+        stats_on.enable()
+        cls.addClassCleanup(stats_on.disable)
+
+    def setUp(self):
+        super().setUp()
+        self.client.test = self
+
+    def check_query_budget(self, response):
+        label = view_label(response.wsgi_request)
+        budget = self.query_budgets.get(label)
+        if budget is None:
+            return
+        queries = response.query_stats.queries
+        self.assertLessEqual(queries, budget, (
+            f"{label} ran {queries} queries for {response.wsgi_request.method} "
+            f"{response.wsgi_request.get_full_path()}, its budget is {budget}"))